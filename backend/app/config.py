@@ -10,16 +10,51 @@ class Settings(BaseSettings):
     
     # Database
     database_url: str
+    # Each process may open up to the sum of both pools' size and overflow
+    db_pool_size: int = 10  # Sync engine: sync routes, sync runs, rollup, webhook flushes
+    db_max_overflow: int = 20
+    db_async_pool_size: int = 5  # Async engine: analytics and health requests
+    db_async_max_overflow: int = 10
     
     # Guesty API
     guesty_client_id: str = ""
     guesty_client_secret: str = ""
     guesty_base_url: str = "https://open-api.guesty.com/v1"
     guesty_token_url: str = "https://open-api.guesty.com/oauth2/token"
+    guesty_page_concurrency: int = 4  # Page requests in flight per collection
+    guesty_rate_limit_per_second: int = 15
+    guesty_rate_limit_per_minute: int = 120
+    guesty_rate_limit_per_hour: int = 5000
+    guesty_rate_limit_share: float = 0.8  # Fraction of the limits above used here; listings-api defaults to the other 0.2
+    guesty_max_retries: int = 6
     
     # Sync Configuration
     sync_lookback_years: int = 3
     sync_cron_schedule: str = "0 3 * * *"
+    sync_reservations_interval_minutes: int = 5
+    scheduler_enabled: bool = True  # Run scheduled syncs (in the worker when sync_worker_enabled)
+    sync_worker_enabled: bool = False  # Queue syncs for `python -m app.jobs.worker` instead of running them in the API
+    worker_poll_seconds: float = 2.0
+    worker_requeue_seconds: float = 30.0  # Delay before retrying a job that found another sync running
+    sync_pipeline_depth: int = 4  # Pages buffered between fetch, transform and write
+    sync_backfill_window_months: int = 1
+    sync_backfill_workers: int = 4
+    sync_landing_dir: str = ""  # Keep raw API pages here for replay; empty disables
+    sync_copy_threshold: int = 5000  # Rows per COPY bulk load of reservations/conversations; 0 disables
+    sync_guests_mode: str = "full"  # "lazy" fetches only guests referenced by reservations/conversations
+    sync_guest_refresh_days: int = 30  # Lazy mode: refetch referenced guests older than this
+    
+    # Webhooks
+    guesty_webhook_secret: str = ""  # Svix signing secret (whsec_...); webhooks are refused until it is set
+    webhook_tolerance_seconds: int = 300  # Largest age (or clock skew) of a signed webhook's svix-timestamp
+    webhook_batch_size: int = 500  # Queued records that trigger an early flush
+    webhook_flush_seconds: float = 2.0
+    
+    # Analytics
+    analytics_use_rollup: bool = True  # Read reservation_daily_facts once it has been built
+    analytics_cache_size: int = 256  # Cached analytics results; 0 disables
+    analytics_parallel_queries: int = 4  # Extra sessions analytics requests may open at once, all requests together
+    analytics_generation_ttl_seconds: float = 5.0  # How often to check for a newer completed sync
     
     # API Configuration
     api_port: int = 8000
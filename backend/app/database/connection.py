@@ -1,8 +1,9 @@
 """Database connection and session management."""
 
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+from typing import AsyncGenerator, Generator
 from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
 
 from app.config import get_settings
@@ -23,15 +24,47 @@ def _with_sslmode(database_url: str) -> str:
         parsed = parsed._replace(query=urlencode(query))
     return urlunparse(parsed)
 
+
+def _async_url(database_url: str) -> tuple[str, dict]:
+    """
+    Convert a Postgres URL for the asyncpg driver.
+    
+    asyncpg takes ``ssl`` as a connect argument instead of libpq's
+    ``sslmode`` query parameter, so it is moved there.
+    
+    Returns:
+        Tuple of (URL, connect_args)
+    """
+    parsed = urlparse(_with_sslmode(database_url))
+    if not parsed.scheme.startswith("postgres"):
+        return database_url, {}
+    query = dict(parse_qsl(parsed.query))
+    sslmode = query.pop("sslmode", None)
+    parsed = parsed._replace(scheme="postgresql+asyncpg", query=urlencode(query))
+    return urlunparse(parsed), {"ssl": sslmode} if sslmode and sslmode != "disable" else {}
+
+
 engine = create_engine(
     _with_sslmode(settings.database_url),
     pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for request handlers, so queries do not block the event loop
+_async_database_url, _async_connect_args = _async_url(settings.database_url)
+async_engine = create_async_engine(
+    _async_database_url,
+    connect_args=_async_connect_args,
+    pool_pre_ping=True,
+    pool_size=settings.db_async_pool_size,
+    max_overflow=settings.db_async_max_overflow,
+)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 
 def get_db() -> Generator[Session, None, None]:
     """Dependency to get database session."""
@@ -40,3 +73,9 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency to get an async database session."""
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,45 @@
+"""Additive schema changes for tables that already exist in production."""
+
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# ``Base.metadata.create_all`` only creates missing tables, so columns added to
+# an existing model are listed here as (table, column, column DDL).
+ADDED_COLUMNS = [
+    ("sync_logs", "records_inserted", "INTEGER DEFAULT 0"),
+    ("sync_logs", "records_updated", "INTEGER DEFAULT 0"),
+    ("sync_logs", "records_unchanged", "INTEGER DEFAULT 0"),
+    ("sync_windows", "records_unchanged", "INTEGER DEFAULT 0"),
+    ("listings", "row_hash", "VARCHAR(64)"),
+    ("guests", "row_hash", "VARCHAR(64)"),
+    ("reservations", "row_hash", "VARCHAR(64)"),
+    ("conversations", "row_hash", "VARCHAR(64)"),
+    ("reservations", "guest_guesty_id", "VARCHAR(50)"),
+    ("conversations", "guest_guesty_id", "VARCHAR(50)"),
+    ("reservations", "rolled_up_check_in", "DATE"),
+    ("sync_jobs", "run_after", "TIMESTAMP"),
+]
+
+# Indexes added to existing tables, as (index, table, column)
+ADDED_INDEXES = [
+    ("ix_reservations_guest_guesty_id", "reservations", "guest_guesty_id"),
+    ("ix_conversations_guest_guesty_id", "conversations", "guest_guesty_id"),
+    ("ix_reservations_updated_at", "reservations", "updated_at"),
+]
+
+
+def apply_added_columns(engine: Engine) -> None:
+    """Add any columns from ADDED_COLUMNS and indexes from ADDED_INDEXES that the database is missing."""
+    if engine.dialect.name != "postgresql":
+        return
+    
+    with engine.begin() as conn:
+        for table, column, ddl in ADDED_COLUMNS:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {ddl}"))
+        for index, table, column in ADDED_INDEXES:
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index} ON {table} ({column})"))
+    logger.info("Applied additive schema changes")
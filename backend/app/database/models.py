@@ -4,13 +4,17 @@ from datetime import datetime
 from typing import Optional
 from sqlalchemy import (
     Column, String, Integer, BigInteger, Boolean, DateTime, 
-    Date, ForeignKey, Index, Text, Enum as SQLEnum
+    Date, Float, ForeignKey, Index, Sequence, Text, Enum as SQLEnum
 )
 from sqlalchemy.orm import declarative_base, relationship
 import enum
 
 Base = declarative_base()
 
+# Data generation: advanced after every successful write that analytics can
+# see (sync run, backfill, webhook batch), and never reused, unlike sync ids
+DATA_GENERATION = Sequence("data_generation_seq", metadata=Base.metadata)
+
 
 class SyncStatus(enum.Enum):
     """Status of a sync operation."""
@@ -40,6 +44,7 @@ class Listing(Base):
     property_type = Column(String(100))
     active = Column(Boolean, default=True)
     address = Column(Text)
+    row_hash = Column(String(64))  # SHA-256 of the synced column values
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -55,6 +60,7 @@ class Guest(Base):
     id = Column(String(36), primary_key=True)
     guesty_id = Column(String(50), unique=True, nullable=False, index=True)
     email_hash = Column(String(64))  # SHA-256 hash
+    row_hash = Column(String(64))  # SHA-256 of the synced column values
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -71,6 +77,7 @@ class Reservation(Base):
     guesty_id = Column(String(50), unique=True, nullable=False, index=True)
     listing_id = Column(String(36), ForeignKey("listings.id"), nullable=True)
     guest_id = Column(String(36), ForeignKey("guests.id"), nullable=True)
+    guest_guesty_id = Column(String(50), nullable=True, index=True)  # Kept to link guests synced later
     
     source = Column(String(50), nullable=False, index=True)  # Normalized OTA source
     status = Column(String(20), nullable=False, index=True)
@@ -88,8 +95,10 @@ class Reservation(Base):
     
     cancelled_at = Column(DateTime, nullable=True)
     
+    row_hash = Column(String(64))  # SHA-256 of the synced column values
+    rolled_up_check_in = Column(Date, nullable=True)  # check_in as last counted in reservation_daily_facts
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # Relationships
     listing = relationship("Listing", back_populates="reservations")
@@ -112,6 +121,7 @@ class Conversation(Base):
     guesty_id = Column(String(50), unique=True, nullable=False, index=True)
     listing_id = Column(String(36), ForeignKey("listings.id"), nullable=True)
     guest_id = Column(String(36), ForeignKey("guests.id"), nullable=True)
+    guest_guesty_id = Column(String(50), nullable=True, index=True)  # Kept to link guests synced later
     reservation_id = Column(String(36), ForeignKey("reservations.id"), nullable=True)
     
     source = Column(String(50), nullable=False, index=True)
@@ -120,6 +130,7 @@ class Conversation(Base):
     first_message_at = Column(DateTime, nullable=True)
     message_count = Column(Integer, default=0)
     
+    row_hash = Column(String(64))  # SHA-256 of the synced column values
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -140,9 +151,149 @@ class SyncLog(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     entity_type = Column(String(50), nullable=False)  # listings, reservations, etc.
     records_synced = Column(Integer, default=0)
+    records_inserted = Column(Integer, default=0)
+    records_updated = Column(Integer, default=0)
+    records_unchanged = Column(Integer, default=0)
     started_at = Column(DateTime, nullable=False)
     completed_at = Column(DateTime, nullable=True)
     status = Column(String(20), nullable=False, default="running")
     error_message = Column(Text, nullable=True)
     
     created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class SyncState(Base):
+    """Per-entity high-water mark used by incremental syncs."""
+    __tablename__ = "sync_state"
+    
+    entity_type = Column(String(50), primary_key=True)  # listings, reservations, etc.
+    last_updated_at = Column(DateTime, nullable=True)  # Max Guesty updatedAt seen
+    last_synced_at = Column(DateTime, nullable=True)
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class SyncWindow(Base):
+    """A check-in date window of a sharded backfill, tracked so it can be retried alone."""
+    __tablename__ = "sync_windows"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    sync_log_id = Column(Integer, ForeignKey("sync_logs.id"), nullable=False, index=True)
+    entity_type = Column(String(50), nullable=False)
+    window_start = Column(Date, nullable=False)
+    window_end = Column(Date, nullable=True)  # Open-ended for the latest window
+    status = Column(String(20), nullable=False, default="pending")
+    records_synced = Column(Integer, default=0)
+    records_inserted = Column(Integer, default=0)
+    records_updated = Column(Integer, default=0)
+    records_unchanged = Column(Integer, default=0)
+    last_updated_at = Column(DateTime, nullable=True)  # Max Guesty updatedAt seen
+    started_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+    error_message = Column(Text, nullable=True)
+
+
+class SyncCheckpoint(Base):
+    """Last committed page of an entity (or backfill window) within a sync run."""
+    __tablename__ = "sync_checkpoints"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    sync_log_id = Column(Integer, ForeignKey("sync_logs.id"), nullable=False, index=True)
+    sync_window_id = Column(Integer, ForeignKey("sync_windows.id"), nullable=True)
+    entity_type = Column(String(50), nullable=False)
+    
+    filters = Column(Text, nullable=True)  # JSON Guesty filters the run was paging with
+    next_skip = Column(Integer, default=0)
+    last_guesty_id = Column(String(50), nullable=True)
+    last_updated_at = Column(DateTime, nullable=True)  # Max Guesty updatedAt committed so far
+    pages_committed = Column(Integer, default=0)
+    completed = Column(Boolean, default=False)
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class SyncJob(Base):
+    """Sync request queued for the dedicated worker process."""
+    __tablename__ = "sync_jobs"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    kind = Column(String(20), nullable=False)  # full, incremental, resume, replay, backfill
+    params = Column(Text, nullable=True)  # JSON keyword arguments for the job
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, success, failed
+    worker = Column(String(100), nullable=True)  # host:pid of the worker that claimed it
+    enqueued_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    run_after = Column(DateTime, nullable=True)  # Not claimed before this time
+    started_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+    error_message = Column(Text, nullable=True)
+    
+    __table_args__ = (
+        Index("ix_sync_jobs_status_id", "status", "id"),
+    )
+
+
+class SyncStageMetric(Base):
+    """Per-stage throughput of one entity (or backfill window) within a sync run."""
+    __tablename__ = "sync_stage_metrics"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    sync_log_id = Column(Integer, ForeignKey("sync_logs.id"), nullable=False, index=True)
+    sync_window_id = Column(Integer, ForeignKey("sync_windows.id"), nullable=True)
+    entity_type = Column(String(50), nullable=False)
+    status = Column(String(20), nullable=False)  # success, failed
+    
+    # Fetch: Guesty API
+    pages_fetched = Column(Integer, default=0)
+    requests = Column(Integer, default=0)
+    retries = Column(Integer, default=0)
+    rate_limited = Column(Integer, default=0)  # 429 responses
+    bytes_received = Column(BigInteger, default=0)
+    api_latency_p50_ms = Column(Float, nullable=True)
+    api_latency_p95_ms = Column(Float, nullable=True)
+    throttle_seconds = Column(Float, default=0)  # Rate limiter waits, 429 pauses and backoff
+    
+    # Transform
+    rows_transformed = Column(Integer, default=0)
+    transform_seconds = Column(Float, default=0)
+    transform_rows_per_second = Column(Float, nullable=True)
+    
+    # Write: upserts and commits
+    rows_written = Column(Integer, default=0)
+    write_seconds = Column(Float, default=0)
+    commits = Column(Integer, default=0)
+    commit_seconds = Column(Float, default=0)
+    
+    elapsed_seconds = Column(Float, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ReservationDailyFact(Base):
+    """
+    Reservations rolled up per listing, source, status, check-in day and booking day.
+    
+    Maintained by ``refresh_daily_facts`` after each sync; the analytics
+    endpoints aggregate these rows instead of scanning ``reservations``.
+    Averages are sums divided by the matching non-NULL counts.
+    """
+    __tablename__ = "reservation_daily_facts"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    listing_id = Column(String(36), nullable=True)
+    source = Column(String(50), nullable=False)
+    status = Column(String(20), nullable=False)
+    check_in = Column(Date, nullable=False)
+    booked_on = Column(Date, nullable=False)
+    
+    bookings = Column(Integer, nullable=False, default=0)
+    revenue_cents = Column(BigInteger, nullable=False, default=0)
+    nights = Column(Integer, nullable=False, default=0)
+    nights_count = Column(Integer, nullable=False, default=0)
+    lead_time_days = Column(Integer, nullable=False, default=0)
+    lead_time_count = Column(Integer, nullable=False, default=0)
+    cancel_notice_days = Column(Integer, nullable=False, default=0)  # Days between cancellation and check-in
+    cancel_notice_count = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        Index("ix_reservation_daily_facts_check_in_source", "check_in", "source"),
+        Index("ix_reservation_daily_facts_listing_check_in", "listing_id", "check_in"),
+    )
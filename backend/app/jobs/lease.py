@@ -0,0 +1,47 @@
+"""Postgres advisory-lock leases shared by every app process."""
+
+import hashlib
+from contextlib import contextmanager
+from typing import Iterator
+
+from sqlalchemy import text
+
+from app.database.connection import engine
+
+# Held by whichever process is currently running a Guesty sync or backfill
+SYNC_LEASE = "guesty-sync"
+
+
+def lease_key(name: str) -> int:
+    """Map a lease name onto Postgres's signed 64-bit advisory-lock key space."""
+    return int.from_bytes(hashlib.sha256(name.encode()).digest()[:8], "big", signed=True)
+
+
+@contextmanager
+def advisory_lease(name: str) -> Iterator[bool]:
+    """
+    Try to take a session-level advisory lock for the duration of the block.
+    
+    The lock lives on a dedicated autocommit connection, so it is released
+    when the block exits or, if the process dies, when Postgres drops the
+    connection. Never blocks: yields False if another process holds it.
+    """
+    key = lease_key(name)
+    connection = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+    try:
+        acquired = bool(connection.execute(
+            text("SELECT pg_try_advisory_lock(:key)"), {"key": key}
+        ).scalar())
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+    finally:
+        connection.close()
+
+
+def lease_held(name: str) -> bool:
+    """Check whether another process currently holds a lease."""
+    with advisory_lease(name) as acquired:
+        return not acquired
@@ -0,0 +1,139 @@
+"""Postgres-backed queue of sync jobs for the dedicated worker."""
+
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.database.models import SyncJob
+from app.jobs.lease import SYNC_LEASE, lease_held
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def job_handlers() -> dict[str, Callable[..., Optional[bool]]]:
+    """Sync entry points by job kind."""
+    # Import here to avoid circular imports
+    from app.services.sync import (
+        resume_sync,
+        run_full_sync,
+        run_incremental_sync,
+        run_replay,
+        run_reservation_backfill,
+    )
+    
+    return {
+        "full": run_full_sync,
+        "incremental": run_incremental_sync,
+        "resume": resume_sync,
+        "replay": run_replay,
+        "backfill": run_reservation_backfill,
+    }
+
+
+def enqueue_job(db: Session, kind: str, **params) -> SyncJob:
+    """
+    Queue a sync job, or return the identical job that is already waiting.
+    
+    Args:
+        db: Database session
+        kind: Key of ``job_handlers``
+        params: Keyword arguments passed to the handler
+    """
+    encoded = json.dumps(params, sort_keys=True) if params else None
+    job = db.query(SyncJob).filter(
+        SyncJob.status == "queued",
+        SyncJob.kind == kind,
+        SyncJob.params.is_(None) if encoded is None else SyncJob.params == encoded,
+    ).first()
+    if job is None:
+        job = SyncJob(kind=kind, params=encoded, status="queued", enqueued_at=datetime.utcnow())
+        db.add(job)
+        db.commit()
+    return job
+
+
+def claim_next_job(db: Session, worker: str) -> Optional[SyncJob]:
+    """
+    Claim the oldest queued job that is due for ``worker``.
+    
+    ``FOR UPDATE SKIP LOCKED`` lets several workers poll the same table
+    without ever claiming the same job twice.
+    """
+    job = db.query(SyncJob).filter(
+        SyncJob.status == "queued",
+        or_(SyncJob.run_after.is_(None), SyncJob.run_after <= datetime.utcnow()),
+    ).order_by(SyncJob.id).with_for_update(skip_locked=True).first()
+    if job is None:
+        db.rollback()
+        return None
+    
+    job.status = "running"
+    job.worker = worker
+    job.started_at = datetime.utcnow()
+    db.commit()
+    return job
+
+
+def _requeue(job: SyncJob, reason: str, delay: timedelta = timedelta(0)):
+    job.status = "queued"
+    job.worker = None
+    job.started_at = None
+    job.run_after = datetime.utcnow() + delay
+    job.error_message = reason
+
+
+def run_job(db: Session, job: SyncJob):
+    """
+    Run a claimed job and record its outcome.
+    
+    A job whose handler finds another sync running (e.g. the scheduler's
+    tick in this worker) goes back to the queue for
+    ``worker_requeue_seconds`` instead of being dropped.
+    """
+    handler = job_handlers().get(job.kind)
+    try:
+        if handler is None:
+            raise ValueError(f"Unknown sync job kind: {job.kind}")
+        params = json.loads(job.params) if job.params else {}
+        ran = handler(**params)
+        # Handlers return False when another process holds the sync lease
+        if ran is False:
+            _requeue(job, "Another sync was running; queued again",
+                     timedelta(seconds=settings.worker_requeue_seconds))
+            db.commit()
+            return
+        job.status = "success"
+        job.error_message = None
+    except Exception as e:
+        job.status = "failed"
+        job.error_message = str(e)
+    
+    job.completed_at = datetime.utcnow()
+    db.commit()
+
+
+def requeue_interrupted_jobs(db: Session) -> int:
+    """
+    Queue again the jobs left running by a worker that died.
+    
+    Jobs only run under the sync lease, so while nobody holds it no job
+    can really be running. Called when a worker starts.
+    
+    Returns:
+        Number of jobs queued again
+    """
+    if lease_held(SYNC_LEASE):
+        return 0
+    jobs = db.query(SyncJob).filter(SyncJob.status == "running").all()
+    for job in jobs:
+        _requeue(job, f"Worker {job.worker} stopped before the job finished; queued again")
+    db.commit()
+    if jobs:
+        logger.info(f"Queued {len(jobs)} interrupted sync jobs again")
+    return len(jobs)
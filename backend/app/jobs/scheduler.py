@@ -0,0 +1,88 @@
+"""Built-in scheduler for recurring Guesty syncs."""
+
+import logging
+from datetime import timedelta
+from typing import Optional
+
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_scheduler: Optional[BackgroundScheduler] = None
+
+
+def scheduled_syncs() -> dict[str, dict]:
+    """
+    Recurring sync jobs by name.
+    
+    Reservations and conversations change all day and are cheap to sync
+    incrementally, so they run every few minutes. The whole account,
+    including the heavier listings and guests, is synced on
+    ``sync_cron_schedule``.
+    """
+    interval = timedelta(minutes=settings.sync_reservations_interval_minutes)
+    return {
+        "reservations": {
+            "entities": ("reservations", "conversations"),
+            "trigger": IntervalTrigger(minutes=settings.sync_reservations_interval_minutes),
+            "min_interval": interval / 2,
+        },
+        "nightly": {
+            "entities": ("listings", "guests", "reservations", "conversations"),
+            "trigger": CronTrigger.from_crontab(settings.sync_cron_schedule, timezone="UTC"),
+            "min_interval": timedelta(hours=1),
+        },
+    }
+
+
+def run_scheduled_sync(name: str):
+    """Run one scheduled sync unless another process already ran or is running it."""
+    # Import here to avoid circular imports
+    from app.services.sync import run_sync
+    
+    job = scheduled_syncs()[name]
+    try:
+        run_sync(
+            incremental=True,
+            entities=job["entities"],
+            min_interval=job["min_interval"],
+        )
+    except Exception as e:
+        logger.error(f"Scheduled {name} sync failed: {e}")
+
+
+def start_scheduler() -> BackgroundScheduler:
+    """
+    Start the sync scheduler in this process.
+    
+    Every API worker may run one; the sync lease makes sure only a single
+    process does the work of each tick.
+    """
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = BackgroundScheduler(timezone="UTC")
+        for name, job in scheduled_syncs().items():
+            _scheduler.add_job(
+                run_scheduled_sync,
+                job["trigger"],
+                args=[name],
+                id=f"sync-{name}",
+                coalesce=True,
+                max_instances=1,
+            )
+        _scheduler.start()
+        logger.info(f"Sync scheduler started with jobs: {', '.join(scheduled_syncs())}")
+    return _scheduler
+
+
+def shutdown_scheduler():
+    """Stop the scheduler without waiting for a running sync."""
+    global _scheduler
+    if _scheduler is not None:
+        _scheduler.shutdown(wait=False)
+        _scheduler = None
@@ -0,0 +1,78 @@
+"""
+Dedicated sync worker process.
+
+Runs queued sync jobs (and the sync scheduler) outside the API, on its own
+connection pool, so dashboard requests never compete with a sync:
+
+    python -m app.jobs.worker
+"""
+
+import logging
+import os
+import signal
+import socket
+import threading
+
+from app.config import get_settings
+from app.database.connection import SessionLocal, engine
+from app.database.migrations import apply_added_columns
+from app.database.models import Base
+from app.jobs.queue import claim_next_job, requeue_interrupted_jobs, run_job
+from app.jobs.scheduler import shutdown_scheduler, start_scheduler
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def run_worker(stop: threading.Event):
+    """Poll the job queue until ``stop`` is set, running one job at a time."""
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    logger.info(f"Sync worker {worker} started")
+    
+    db = SessionLocal()
+    try:
+        requeue_interrupted_jobs(db)
+    finally:
+        db.close()
+    
+    while not stop.is_set():
+        db = SessionLocal()
+        try:
+            job = claim_next_job(db, worker)
+            if job is None:
+                stop.wait(settings.worker_poll_seconds)
+                continue
+            
+            logger.info(f"Running sync job {job.id} ({job.kind})")
+            run_job(db, job)
+            logger.info(f"Sync job {job.id} finished: {job.status}")
+        except Exception as e:
+            logger.error(f"Sync worker error: {e}")
+            db.rollback()
+            stop.wait(settings.worker_poll_seconds)
+        finally:
+            db.close()
+    
+    logger.info(f"Sync worker {worker} stopped")
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    Base.metadata.create_all(bind=engine)
+    apply_added_columns(engine)
+    
+    # Finish the current job on SIGTERM/SIGINT, then exit
+    stop = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: stop.set())
+    
+    if settings.scheduler_enabled:
+        start_scheduler()
+    try:
+        run_worker(stop)
+    finally:
+        shutdown_scheduler()
+
+
+if __name__ == "__main__":
+    main()
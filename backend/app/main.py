@@ -8,9 +8,12 @@ from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
 
 from app.config import get_settings
-from app.database.connection import engine
+from app.database.connection import async_engine, engine
+from app.database.migrations import apply_added_columns
 from app.database.models import Base
-from app.routes import health, analytics, sync
+from app.jobs.scheduler import shutdown_scheduler, start_scheduler
+from app.routes import health, analytics, exports, sync, webhooks
+from app.services.sync.webhooks import webhook_buffer
 
 settings = get_settings()
 FRONTEND_DIR = Path(__file__).resolve().parent / "static"
@@ -22,8 +25,16 @@ async def lifespan(app: FastAPI):
     """Application lifespan events."""
     # Startup: Create database tables
     Base.metadata.create_all(bind=engine)
+    apply_added_columns(engine)
+    webhook_buffer.start()
+    # With a dedicated worker, the worker process runs the scheduler instead
+    if settings.scheduler_enabled and not settings.sync_worker_enabled:
+        start_scheduler()
     yield
-    # Shutdown: Cleanup if needed
+    # Shutdown: Stop scheduling and write queued webhook events
+    shutdown_scheduler()
+    await webhook_buffer.stop()
+    await async_engine.dispose()
 
 
 app = FastAPI(
@@ -45,7 +56,9 @@ app.add_middleware(
 # Include routers
 app.include_router(health.router)
 app.include_router(analytics.router)
+app.include_router(exports.router)
 app.include_router(sync.router)
+app.include_router(webhooks.router)
 
 # Serve built frontend if present
 if (FRONTEND_DIR / "assets").exists():
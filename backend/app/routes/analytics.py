@@ -1,15 +1,114 @@
 """Analytics endpoints for dashboard data."""
 
+import asyncio
+from collections import defaultdict
 from datetime import date, datetime
 from typing import Optional
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func, case, extract, Date
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, func, case, cast, extract, select, Date, DateTime, Float
 
-from app.database.connection import get_db
-from app.database.models import Reservation, Listing, Conversation
+from app.config import get_settings
+from app.database.connection import AsyncSessionLocal, get_async_db
+from app.database.models import Reservation, ReservationDailyFact, Listing, Conversation, SyncState
+from app.services.analytics_cache import analytics_cache, cached_result
+from app.services.distributions import METRICS, distribution_statements, parse_edges, shape_distribution
+from app.services.sync.rollup import FACTS_STATE
 
 router = APIRouter(prefix="/api/analytics", tags=["analytics"])
+settings = get_settings()
+
+
+class ReservationMeasures:
+    """
+    Reservation aggregates, computed from ``reservations`` or from the daily rollup.
+    
+    ``model`` has the filtered columns (listing_id, source, status, check_in)
+    under the same names in both tables, so the same queries and
+    ``apply_filters`` work on either source. ``where(condition)`` gives the
+    same aggregates restricted by FILTER clauses, so differently filtered
+    aggregates can share one statement.
+    """
+    
+    def __init__(self, model, booked_at, build, condition=None):
+        self.model = model
+        self.booked_at = booked_at
+        self.condition = condition
+        self._build = build
+        
+        def aggregate(expression):
+            return expression if condition is None else expression.filter(condition)
+        
+        measures = build(aggregate)
+        self.bookings = measures["bookings"]
+        self.revenue = measures["revenue"]
+        self.nights = measures["nights"]
+        self.avg_lead_time = measures["avg_lead_time"]
+        self.avg_nights = measures["avg_nights"]
+        self.cancellations = measures["cancellations"]
+        self.avg_cancel_notice = measures["avg_cancel_notice"]
+    
+    def where(self, condition) -> "ReservationMeasures":
+        if self.condition is not None:
+            condition = and_(self.condition, condition)
+        return ReservationMeasures(self.model, self.booked_at, self._build, condition)
+
+
+def _raw_measures(aggregate) -> dict:
+    return {
+        "bookings": aggregate(func.count(Reservation.id)),
+        "revenue": func.coalesce(aggregate(func.sum(Reservation.total_price)), 0),
+        "nights": func.coalesce(aggregate(func.sum(Reservation.nights)), 0),
+        "avg_lead_time": func.coalesce(aggregate(func.avg(Reservation.lead_time_days)), 0),
+        "avg_nights": func.coalesce(aggregate(func.avg(Reservation.nights)), 0),
+        "cancellations": func.coalesce(
+            aggregate(func.sum(case((Reservation.status == 'cancelled', 1), else_=0))), 0
+        ),
+        "avg_cancel_notice": aggregate(func.avg(case((
+            Reservation.cancelled_at.isnot(None),
+            # date - date is already a whole number of days in Postgres
+            Reservation.check_in - func.cast(Reservation.cancelled_at, Date),
+        )))),
+    }
+
+
+def _rollup_measures(aggregate) -> dict:
+    def average(total, count):
+        """Average of a rollup sum column over its non-NULL count column."""
+        return func.coalesce(
+            cast(aggregate(func.sum(total)), Float) / cast(func.nullif(aggregate(func.sum(count)), 0), Float), 0
+        )
+    
+    return {
+        "bookings": func.coalesce(aggregate(func.sum(ReservationDailyFact.bookings)), 0),
+        "revenue": func.coalesce(aggregate(func.sum(ReservationDailyFact.revenue_cents)), 0),
+        "nights": func.coalesce(aggregate(func.sum(ReservationDailyFact.nights)), 0),
+        "avg_lead_time": average(ReservationDailyFact.lead_time_days, ReservationDailyFact.lead_time_count),
+        "avg_nights": average(ReservationDailyFact.nights, ReservationDailyFact.nights_count),
+        "cancellations": func.coalesce(aggregate(func.sum(case(
+            (ReservationDailyFact.status == 'cancelled', ReservationDailyFact.bookings), else_=0
+        ))), 0),
+        "avg_cancel_notice": average(
+            ReservationDailyFact.cancel_notice_days, ReservationDailyFact.cancel_notice_count
+        ),
+    }
+
+
+RAW_MEASURES = ReservationMeasures(Reservation, Reservation.booked_at, _raw_measures)
+
+ROLLUP_MEASURES = ReservationMeasures(
+    ReservationDailyFact, cast(ReservationDailyFact.booked_on, DateTime), _rollup_measures
+)
+
+
+async def reservation_measures(db: AsyncSession) -> ReservationMeasures:
+    """Use the daily rollup once it has been built, the raw table before that."""
+    if settings.analytics_use_rollup and await db.get(SyncState, FACTS_STATE) is not None:
+        return ROLLUP_MEASURES
+    return RAW_MEASURES
+
+
+DAY_NAMES = ['sunday', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday']
 
 
 def parse_date(date_str: Optional[str]) -> Optional[date]:
@@ -19,56 +118,106 @@ def parse_date(date_str: Optional[str]) -> Optional[date]:
     return datetime.strptime(date_str, "%Y-%m-%d").date()
 
 
+def normalize_param(name: str, value):
+    """Canonical query parameter value for cache keys."""
+    if name in ("start_date", "end_date"):
+        return parse_date(value).isoformat()
+    if name == "fields":
+        return ",".join(sorted(field.strip() for field in value.split(",") if field.strip()))
+    if name == "edges":
+        return ",".join(str(float(edge)) for edge in value.split(",") if edge.strip())
+    return value
+
+
 def apply_filters(query, start_date: Optional[str], end_date: Optional[str], 
-                  source: Optional[str], listing_id: Optional[str]):
-    """Apply common filters to a query."""
+                  source: Optional[str], listing_id: Optional[str], model=Reservation):
+    """Apply common filters to a query on ``model`` (reservations or the daily rollup)."""
     if start_date:
-        query = query.filter(Reservation.check_in >= parse_date(start_date))
+        query = query.filter(model.check_in >= parse_date(start_date))
     if end_date:
-        query = query.filter(Reservation.check_in <= parse_date(end_date))
+        query = query.filter(model.check_in <= parse_date(end_date))
     if source:
-        query = query.filter(Reservation.source == source)
+        query = query.filter(model.source == source)
     if listing_id:
-        query = query.filter(Reservation.listing_id == listing_id)
+        query = query.filter(model.listing_id == listing_id)
     return query
 
 
+# Most listings one listing-performance page may hold
+MAX_LISTINGS_PAGE = 500
+
+# Listing fields that listing-performance can project; id is always returned
+LISTING_FIELDS = (
+    "name", "address", "bedrooms", "bathrooms", "property_type",
+    "total_revenue", "total_bookings", "total_nights", "months",
+)
+
+
+def parse_cursor(after: str) -> tuple[int, str]:
+    """
+    Split a listing-performance cursor, ``<revenue>:<listing id>``.
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    revenue, separator, listing = after.partition(":")
+    if not separator or not listing:
+        raise ValueError("Cursor must be <revenue>:<listing id>")
+    return int(revenue), listing
+
+
+# Shared by every request, so concurrent dashboards cannot take the whole async
+# pool and leave other requests waiting for a connection
+_query_slots = asyncio.Semaphore(max(1, settings.analytics_parallel_queries))
+
+
+async def _fetch_all(statement) -> list:
+    """
+    Run a statement on its own session, so several can run at once.
+    
+    At most ``analytics_parallel_queries`` such sessions are open at a time
+    across all requests; the rest wait for a free slot.
+    """
+    async with _query_slots:
+        async with AsyncSessionLocal() as session:
+            return (await session.execute(statement)).all()
+
+
 @router.get("/summary")
+@cached_result(normalize_param)
 async def get_summary(
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
     source: Optional[str] = Query(None),
     listing_id: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get high-level KPI summary."""
-    # Base query for reservations
-    query = db.query(Reservation).filter(Reservation.status != 'cancelled')
-    query = apply_filters(query, start_date, end_date, source, listing_id)
+    m = await reservation_measures(db)
     
     # Aggregate metrics
-    stats = db.query(
-        func.count(Reservation.id).label('total_bookings'),
-        func.coalesce(func.sum(Reservation.total_price), 0).label('total_revenue'),
-        func.coalesce(func.avg(Reservation.lead_time_days), 0).label('avg_lead_time_days'),
-        func.coalesce(func.avg(Reservation.nights), 0).label('avg_length_of_stay'),
-    ).filter(Reservation.status != 'cancelled')
-    stats = apply_filters(stats, start_date, end_date, source, listing_id)
-    result = stats.first()
+    stats = select(
+        m.bookings.label('total_bookings'),
+        m.revenue.label('total_revenue'),
+        m.avg_lead_time.label('avg_lead_time_days'),
+        m.avg_nights.label('avg_length_of_stay'),
+    ).filter(m.model.status != 'cancelled')
+    stats = apply_filters(stats, start_date, end_date, source, listing_id, m.model)
+    result = (await db.execute(stats)).first()
     
     # Cancellation rate
-    all_bookings = db.query(func.count(Reservation.id))
-    all_bookings = apply_filters(all_bookings, start_date, end_date, source, listing_id)
-    total_all = all_bookings.scalar() or 0
+    all_bookings = select(m.bookings)
+    all_bookings = apply_filters(all_bookings, start_date, end_date, source, listing_id, m.model)
+    total_all = await db.scalar(all_bookings) or 0
     
-    cancelled = db.query(func.count(Reservation.id)).filter(Reservation.status == 'cancelled')
-    cancelled = apply_filters(cancelled, start_date, end_date, source, listing_id)
-    total_cancelled = cancelled.scalar() or 0
+    cancelled = select(m.bookings).filter(m.model.status == 'cancelled')
+    cancelled = apply_filters(cancelled, start_date, end_date, source, listing_id, m.model)
+    total_cancelled = await db.scalar(cancelled) or 0
     
     cancellation_rate = total_cancelled / total_all if total_all > 0 else 0
     
     # Conversion rate (from conversations)
-    conv_query = db.query(Conversation)
+    conv_query = select(func.count(Conversation.id))
     if start_date:
         conv_query = conv_query.filter(Conversation.created_at >= parse_date(start_date))
     if end_date:
@@ -76,20 +225,22 @@ async def get_summary(
     if source:
         conv_query = conv_query.filter(Conversation.source == source)
     
-    total_convs = conv_query.count()
-    converted = conv_query.filter(Conversation.converted_to_booking == True).count()
+    total_convs = await db.scalar(conv_query) or 0
+    converted = await db.scalar(conv_query.filter(Conversation.converted_to_booking == True)) or 0
     conversion_rate = converted / total_convs if total_convs > 0 else 0
     
     # Top source
-    top_source_query = db.query(
-        Reservation.source,
-        func.count(Reservation.id).label('count')
-    ).filter(Reservation.status != 'cancelled')
-    top_source_query = apply_filters(top_source_query, start_date, end_date, source, listing_id)
-    top_source_result = top_source_query.group_by(Reservation.source).order_by(func.count(Reservation.id).desc()).first()
+    top_source_query = select(
+        m.model.source,
+        m.bookings.label('count')
+    ).filter(m.model.status != 'cancelled')
+    top_source_query = apply_filters(top_source_query, start_date, end_date, source, listing_id, m.model)
+    top_source_result = (await db.execute(
+        top_source_query.group_by(m.model.source).order_by(m.bookings.desc()).limit(1)
+    )).first()
     
     return {
-        "total_bookings": result.total_bookings or 0,
+        "total_bookings": int(result.total_bookings or 0),
         "total_revenue": int(result.total_revenue or 0),
         "avg_lead_time_days": round(float(result.avg_lead_time_days or 0), 1),
         "avg_length_of_stay": round(float(result.avg_length_of_stay or 0), 1),
@@ -100,31 +251,33 @@ async def get_summary(
 
 
 @router.get("/by-source")
+@cached_result(normalize_param)
 async def get_by_source(
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
     source: Optional[str] = Query(None),
     listing_id: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get metrics grouped by booking source/OTA."""
-    query = db.query(
-        Reservation.source,
-        func.count(Reservation.id).label('bookings'),
-        func.coalesce(func.sum(Reservation.total_price), 0).label('revenue'),
-        func.coalesce(func.avg(Reservation.lead_time_days), 0).label('avg_lead_time'),
-        func.coalesce(func.avg(Reservation.nights), 0).label('avg_nights'),
-    ).filter(Reservation.status != 'cancelled')
-    
-    query = apply_filters(query, start_date, end_date, source, listing_id)
-    results = query.group_by(Reservation.source).all()
+    m = await reservation_measures(db)
+    query = select(
+        m.model.source,
+        m.bookings.label('bookings'),
+        m.revenue.label('revenue'),
+        m.avg_lead_time.label('avg_lead_time'),
+        m.avg_nights.label('avg_nights'),
+    ).filter(m.model.status != 'cancelled')
+    
+    query = apply_filters(query, start_date, end_date, source, listing_id, m.model)
+    results = (await db.execute(query.group_by(m.model.source))).all()
     
     sources = []
     for r in results:
-        adr = r.revenue / (r.bookings * r.avg_nights) if r.bookings > 0 and r.avg_nights > 0 else 0
+        adr = float(r.revenue) / (float(r.bookings) * float(r.avg_nights)) if r.bookings > 0 and r.avg_nights > 0 else 0
         sources.append({
             "source": r.source,
-            "bookings": r.bookings,
+            "bookings": int(r.bookings),
             "revenue": int(r.revenue),
             "avg_lead_time": round(float(r.avg_lead_time), 1),
             "avg_nights": round(float(r.avg_nights), 1),
@@ -135,35 +288,37 @@ async def get_by_source(
 
 
 @router.get("/time-series")
+@cached_result(normalize_param)
 async def get_time_series(
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
     source: Optional[str] = Query(None),
     listing_id: Optional[str] = Query(None),
     interval: str = Query("month"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get bookings and revenue over time."""
+    m = await reservation_measures(db)
     if interval == "week":
-        period_func = func.date_trunc('week', Reservation.booked_at)
+        period_func = func.date_trunc('week', m.booked_at)
     else:
-        period_func = func.date_trunc('month', Reservation.booked_at)
+        period_func = func.date_trunc('month', m.booked_at)
     
-    query = db.query(
+    query = select(
         period_func.label('period'),
-        func.count(Reservation.id).label('bookings'),
-        func.coalesce(func.sum(Reservation.total_price), 0).label('revenue'),
-    ).filter(Reservation.status != 'cancelled')
+        m.bookings.label('bookings'),
+        m.revenue.label('revenue'),
+    ).filter(m.model.status != 'cancelled')
     
-    query = apply_filters(query, start_date, end_date, source, listing_id)
-    results = query.group_by(period_func).order_by(period_func).all()
+    query = apply_filters(query, start_date, end_date, source, listing_id, m.model)
+    results = (await db.execute(query.group_by(period_func).order_by(period_func))).all()
     
     data = []
     for r in results:
         period_str = r.period.strftime("%Y-%m") if interval == "month" else r.period.strftime("%Y-%m-%d")
         data.append({
             "period": period_str,
-            "bookings": r.bookings,
+            "bookings": int(r.bookings),
             "revenue": int(r.revenue),
         })
     
@@ -171,51 +326,63 @@ async def get_time_series(
 
 
 @router.get("/lead-time-distribution")
+@cached_result(normalize_param)
 async def get_lead_time_distribution(
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
     source: Optional[str] = Query(None),
     listing_id: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    edges: Optional[str] = Query(None, description="Comma-separated bucket edges in days"),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """Get histogram of booking lead times."""
-    query = db.query(Reservation.lead_time_days).filter(
-        Reservation.status != 'cancelled',
-        Reservation.lead_time_days.isnot(None)
+    """Get histogram and percentiles of booking lead times."""
+    return await _distribution("lead_time", edges, start_date, end_date, source, listing_id)
+
+
+@router.get("/distribution/{metric}")
+@cached_result(normalize_param)
+async def get_distribution(
+    metric: str,
+    start_date: Optional[str] = Query(None),
+    end_date: Optional[str] = Query(None),
+    source: Optional[str] = Query(None),
+    listing_id: Optional[str] = Query(None),
+    edges: Optional[str] = Query(None, description="Comma-separated, strictly increasing bucket edges"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Get histogram and p50/p90/p99 of lead_time, nights or price_per_night (cents)."""
+    return await _distribution(metric, edges, start_date, end_date, source, listing_id)
+
+
+async def _distribution(metric_name: str, edges: Optional[str], start_date: Optional[str],
+                        end_date: Optional[str], source: Optional[str], listing_id: Optional[str]) -> dict:
+    metric = METRICS.get(metric_name)
+    if metric is None:
+        raise HTTPException(status_code=404, detail=f"Unknown metric; use one of {', '.join(METRICS)}")
+    try:
+        bucket_edges = parse_edges(edges, metric)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid edges: {e}")
+    
+    statements = distribution_statements(
+        metric, bucket_edges, lambda query: apply_filters(query, start_date, end_date, source, listing_id)
     )
-    query = apply_filters(query, start_date, end_date, source, listing_id)
-    lead_times = [r.lead_time_days for r in query.all()]
-    
-    # Define buckets
-    buckets = [
-        {"range": "0-7", "min": 0, "max": 7, "count": 0},
-        {"range": "8-14", "min": 8, "max": 14, "count": 0},
-        {"range": "15-30", "min": 15, "max": 30, "count": 0},
-        {"range": "31-60", "min": 31, "max": 60, "count": 0},
-        {"range": "61-90", "min": 61, "max": 90, "count": 0},
-        {"range": "90+", "min": 91, "max": 9999, "count": 0},
-    ]
-    
-    for lt in lead_times:
-        for bucket in buckets:
-            if bucket["min"] <= lt <= bucket["max"]:
-                bucket["count"] += 1
-                break
-    
-    return {"buckets": [{"range": b["range"], "count": b["count"]} for b in buckets]}
+    bucket_rows, (percentile_row,) = await asyncio.gather(*[_fetch_all(statement) for statement in statements])
+    return shape_distribution(metric, bucket_edges, bucket_rows, percentile_row)
 
 
 @router.get("/conversion-funnel")
+@cached_result(normalize_param)
 async def get_conversion_funnel(
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
     source: Optional[str] = Query(None),
     listing_id: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get inquiry to booking conversion funnel."""
     # Total conversations (inquiries)
-    conv_query = db.query(Conversation)
+    conv_query = select(func.count(Conversation.id))
     if start_date:
         conv_query = conv_query.filter(Conversation.created_at >= parse_date(start_date))
     if end_date:
@@ -225,10 +392,10 @@ async def get_conversion_funnel(
     if listing_id:
         conv_query = conv_query.filter(Conversation.listing_id == listing_id)
     
-    inquiries = conv_query.count()
+    inquiries = await db.scalar(conv_query) or 0
     
     # Conversations that led to bookings
-    bookings = conv_query.filter(Conversation.converted_to_booking == True).count()
+    bookings = await db.scalar(conv_query.filter(Conversation.converted_to_booking == True)) or 0
     
     # For quotes, we'll estimate as a middle stage (could be refined with actual quote tracking)
     quotes = int(inquiries * 0.6) if inquiries > 0 else 0  # Placeholder estimation
@@ -246,62 +413,66 @@ async def get_conversion_funnel(
 
 
 @router.get("/day-of-week")
+@cached_result(normalize_param)
 async def get_day_of_week(
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
     source: Optional[str] = Query(None),
     listing_id: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get booking patterns by day of week."""
-    query = db.query(
-        extract('dow', Reservation.booked_at).label('day_num'),
-        func.count(Reservation.id).label('bookings'),
-    ).filter(Reservation.status != 'cancelled')
+    m = await reservation_measures(db)
+    query = select(
+        extract('dow', m.booked_at).label('day_num'),
+        m.bookings.label('bookings'),
+    ).filter(m.model.status != 'cancelled')
     
-    query = apply_filters(query, start_date, end_date, source, listing_id)
-    results = query.group_by(extract('dow', Reservation.booked_at)).all()
+    query = apply_filters(query, start_date, end_date, source, listing_id, m.model)
+    results = (await db.execute(query.group_by(extract('dow', m.booked_at)))).all()
     
-    day_names = ['sunday', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday']
     day_counts = {i: 0 for i in range(7)}
     
     for r in results:
-        day_counts[int(r.day_num)] = r.bookings
+        day_counts[int(r.day_num)] = int(r.bookings)
     
-    days = [{"day": day_names[i], "bookings": day_counts[i]} for i in range(7)]
+    days = [{"day": DAY_NAMES[i], "bookings": day_counts[i]} for i in range(7)]
     
     return {"days": days}
 
 
 @router.get("/cancellations")
+@cached_result(normalize_param)
 async def get_cancellations(
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
     source: Optional[str] = Query(None),
     listing_id: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get cancellation statistics."""
+    m = await reservation_measures(db)
+    
     # Total bookings (including cancelled)
-    all_query = db.query(Reservation)
-    all_query = apply_filters(all_query, start_date, end_date, source, listing_id)
-    total_bookings = all_query.count()
+    all_query = select(m.bookings)
+    all_query = apply_filters(all_query, start_date, end_date, source, listing_id, m.model)
+    total_bookings = int(await db.scalar(all_query) or 0)
     
     # Cancelled bookings
-    cancelled_query = db.query(Reservation).filter(Reservation.status == 'cancelled')
-    cancelled_query = apply_filters(cancelled_query, start_date, end_date, source, listing_id)
-    total_cancellations = cancelled_query.count()
+    cancelled_query = select(m.bookings).filter(m.model.status == 'cancelled')
+    cancelled_query = apply_filters(cancelled_query, start_date, end_date, source, listing_id, m.model)
+    total_cancellations = int(await db.scalar(cancelled_query) or 0)
     
     cancellation_rate = total_cancellations / total_bookings if total_bookings > 0 else 0
     
     # By source
-    source_stats = db.query(
-        Reservation.source,
-        func.count(Reservation.id).label('total'),
-        func.sum(case((Reservation.status == 'cancelled', 1), else_=0)).label('cancelled'),
+    source_stats = select(
+        m.model.source,
+        m.bookings.label('total'),
+        m.cancellations.label('cancelled'),
     )
-    source_stats = apply_filters(source_stats, start_date, end_date, source, listing_id)
-    source_results = source_stats.group_by(Reservation.source).all()
+    source_stats = apply_filters(source_stats, start_date, end_date, source, listing_id, m.model)
+    source_results = (await db.execute(source_stats.group_by(m.model.source))).all()
     
     by_source = []
     for r in source_results:
@@ -313,16 +484,9 @@ async def get_cancellations(
         })
     
     # Avg days before check-in for cancellations
-    avg_days = db.query(
-        func.avg(
-            extract('day', Reservation.check_in - func.cast(Reservation.cancelled_at, Date))
-        )
-    ).filter(
-        Reservation.status == 'cancelled',
-        Reservation.cancelled_at.isnot(None)
-    )
-    avg_days = apply_filters(avg_days, start_date, end_date, source, listing_id)
-    avg_days_result = avg_days.scalar()
+    avg_days = select(m.avg_cancel_notice).filter(m.model.status == 'cancelled')
+    avg_days = apply_filters(avg_days, start_date, end_date, source, listing_id, m.model)
+    avg_days_result = await db.scalar(avg_days)
     
     return {
         "total_bookings": total_bookings,
@@ -333,115 +497,328 @@ async def get_cancellations(
     }
 
 
+@router.get("/dashboard")
+@cached_result(normalize_param)
+async def get_dashboard(
+    start_date: Optional[str] = Query(None),
+    end_date: Optional[str] = Query(None),
+    source: Optional[str] = Query(None),
+    listing_id: Optional[str] = Query(None),
+    interval: str = Query("month"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Get every dashboard panel for one set of filters in a single request.
+    
+    Returns the bodies of summary, by-source, time-series,
+    lead-time-distribution, conversion-funnel, day-of-week and cancellations.
+    Aggregates over the same rows share one statement through FILTER
+    clauses, and the remaining statements run concurrently.
+    """
+    m = await reservation_measures(db)
+    booked = m.where(m.model.status != 'cancelled')
+    cancelled = m.where(m.model.status == 'cancelled')
+    
+    def filtered(query, model=m.model):
+        return apply_filters(query, start_date, end_date, source, listing_id, model)
+    
+    totals = filtered(select(
+        booked.bookings.label('bookings'),
+        booked.revenue.label('revenue'),
+        booked.avg_lead_time.label('avg_lead_time'),
+        booked.avg_nights.label('avg_nights'),
+        m.bookings.label('all_bookings'),
+        cancelled.bookings.label('cancelled'),
+        cancelled.avg_cancel_notice.label('avg_cancel_notice'),
+    ))
+    
+    by_source = filtered(select(
+        m.model.source,
+        booked.bookings.label('bookings'),
+        booked.revenue.label('revenue'),
+        booked.avg_lead_time.label('avg_lead_time'),
+        booked.avg_nights.label('avg_nights'),
+        m.bookings.label('total'),
+        cancelled.bookings.label('cancelled'),
+    )).group_by(m.model.source)
+    
+    period = func.date_trunc('week' if interval == "week" else 'month', m.booked_at)
+    time_series = filtered(select(
+        period.label('period'),
+        m.bookings.label('bookings'),
+        m.revenue.label('revenue'),
+    ).filter(m.model.status != 'cancelled')).group_by(period).order_by(period)
+    
+    day_num = extract('dow', m.booked_at)
+    day_of_week = filtered(select(
+        day_num.label('day_num'),
+        m.bookings.label('bookings'),
+    ).filter(m.model.status != 'cancelled')).group_by(day_num)
+    
+    # Per-reservation values are needed, which the daily rollup only keeps as sums
+    lead_time = METRICS["lead_time"]
+    lead_time_buckets, lead_time_percentiles = distribution_statements(
+        lead_time, lead_time.default_edges, lambda query: filtered(query, Reservation)
+    )
+    
+    # The summary's conversion rate ignores listing_id; the funnel applies it
+    in_listing = [Conversation.listing_id == listing_id] if listing_id else []
+    converted = Conversation.converted_to_booking == True
+    conversations = select(
+        func.count().label('total'),
+        func.count().filter(converted).label('converted'),
+        func.count().filter(*in_listing).label('inquiries'),
+        func.count().filter(*in_listing, converted).label('bookings'),
+    )
+    if start_date:
+        conversations = conversations.filter(Conversation.created_at >= parse_date(start_date))
+    if end_date:
+        conversations = conversations.filter(Conversation.created_at <= parse_date(end_date))
+    if source:
+        conversations = conversations.filter(Conversation.source == source)
+    
+    (
+        (totals_row,), source_rows, period_rows, day_rows, lead_time_rows, (lead_time_row,), (conversation_row,)
+    ) = await asyncio.gather(*[
+        _fetch_all(statement)
+        for statement in (
+            totals, by_source, time_series, day_of_week, lead_time_buckets, lead_time_percentiles, conversations
+        )
+    ])
+    
+    booked_sources = [r for r in source_rows if r.bookings > 0]
+    top_source = max(booked_sources, key=lambda r: r.bookings, default=None)
+    all_bookings = int(totals_row.all_bookings or 0)
+    total_cancelled = int(totals_row.cancelled or 0)
+    
+    sources = []
+    for r in booked_sources:
+        adr = float(r.revenue) / (float(r.bookings) * float(r.avg_nights)) if r.avg_nights > 0 else 0
+        sources.append({
+            "source": r.source,
+            "bookings": int(r.bookings),
+            "revenue": int(r.revenue),
+            "avg_lead_time": round(float(r.avg_lead_time), 1),
+            "avg_nights": round(float(r.avg_nights), 1),
+            "adr": round(adr, 0),
+        })
+    
+    day_counts = {int(r.day_num): int(r.bookings) for r in day_rows}
+    quotes = int(conversation_row.inquiries * 0.6)  # Placeholder estimation, as in the funnel
+    
+    return {
+        "summary": {
+            "total_bookings": int(totals_row.bookings or 0),
+            "total_revenue": int(totals_row.revenue or 0),
+            "avg_lead_time_days": round(float(totals_row.avg_lead_time or 0), 1),
+            "avg_length_of_stay": round(float(totals_row.avg_nights or 0), 1),
+            "conversion_rate": round(
+                conversation_row.converted / conversation_row.total if conversation_row.total else 0, 3
+            ),
+            "cancellation_rate": round(total_cancelled / all_bookings if all_bookings else 0, 3),
+            "top_source": top_source.source if top_source is not None else None,
+        },
+        "by_source": {"sources": sources},
+        "time_series": {
+            "interval": interval,
+            "data": [
+                {
+                    "period": r.period.strftime("%Y-%m") if interval == "month" else r.period.strftime("%Y-%m-%d"),
+                    "bookings": int(r.bookings),
+                    "revenue": int(r.revenue),
+                }
+                for r in period_rows
+            ],
+        },
+        "lead_time_distribution": shape_distribution(
+            lead_time, lead_time.default_edges, lead_time_rows, lead_time_row
+        ),
+        "conversion_funnel": {
+            "stages": [
+                {"stage": "inquiries", "count": conversation_row.inquiries},
+                {"stage": "quotes_sent", "count": quotes},
+                {"stage": "bookings", "count": conversation_row.bookings},
+            ],
+            "conversion_rate": round(
+                conversation_row.bookings / conversation_row.inquiries if conversation_row.inquiries else 0, 3
+            ),
+        },
+        "day_of_week": {
+            "days": [{"day": DAY_NAMES[i], "bookings": day_counts.get(i, 0)} for i in range(7)],
+        },
+        "cancellations": {
+            "total_bookings": all_bookings,
+            "total_cancellations": total_cancelled,
+            "cancellation_rate": round(total_cancelled / all_bookings if all_bookings else 0, 3),
+            "by_source": [
+                {
+                    "source": r.source,
+                    "cancellations": int(r.cancelled),
+                    "rate": round(r.cancelled / r.total if r.total > 0 else 0, 3),
+                }
+                for r in source_rows
+            ],
+            "avg_days_before_checkin": round(float(totals_row.avg_cancel_notice or 0), 0),
+        },
+    }
+
+
 @router.get("/listing-performance")
+@cached_result(normalize_param)
 async def get_listing_performance(
-    db: Session = Depends(get_db),
+    start_date: Optional[str] = Query(None),
+    end_date: Optional[str] = Query(None),
+    source: Optional[str] = Query(None),
+    listing_id: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_LISTINGS_PAGE),
+    after: Optional[str] = Query(None),
+    sparse: bool = Query(False),
+    fields: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """Get per-listing revenue breakdown by month and booking channel."""
-    # Get all active listings with their details
-    listings = db.query(Listing).filter(Listing.active == True).all()
-
-    # Get monthly revenue by listing and source for confirmed bookings
-    monthly_data = db.query(
-        Reservation.listing_id,
-        Reservation.source,
-        func.date_trunc('month', Reservation.check_in).label('month'),
-        func.count(Reservation.id).label('bookings'),
-        func.coalesce(func.sum(Reservation.total_price), 0).label('revenue'),
-        func.coalesce(func.sum(Reservation.nights), 0).label('nights'),
-    ).filter(
-        Reservation.status != 'cancelled',
-        Reservation.listing_id.isnot(None),
-    ).group_by(
-        Reservation.listing_id,
-        Reservation.source,
-        func.date_trunc('month', Reservation.check_in),
-    ).all()
-
-    # Build lookup: listing_id -> { month -> { source -> {bookings, revenue, nights} } }
-    from collections import defaultdict
-    listing_months = defaultdict(lambda: defaultdict(lambda: defaultdict(lambda: {"bookings": 0, "revenue": 0, "nights": 0})))
-
-    all_months = set()
-    all_sources = set()
-
-    for row in monthly_data:
-        month_str = row.month.strftime("%Y-%m")
-        all_months.add(month_str)
-        all_sources.add(row.source)
-        entry = listing_months[row.listing_id][month_str][row.source]
-        entry["bookings"] += row.bookings
-        entry["revenue"] += int(row.revenue)
-        entry["nights"] += int(row.nights)
-
-    sorted_months = sorted(all_months)
-    sorted_sources = sorted(all_sources)
-
-    # Build response
+    """
+    Get per-listing revenue breakdown by month and booking channel.
+    
+    Active listings come sorted by revenue, highest first, then by id. With
+    ``limit`` they come a page at a time: pass the returned ``next_cursor``
+    as ``after`` to get the next page. ``sparse`` leaves the zero entries
+    out of each month's ``by_source``. ``fields`` (comma-separated) returns
+    only those listing fields besides ``id``; the monthly breakdown is not
+    queried unless ``months`` is among them.
+    """
+    selected = set(LISTING_FIELDS)
+    if fields:
+        selected = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = selected - set(LISTING_FIELDS)
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields {', '.join(sorted(unknown))}; use {', '.join(LISTING_FIELDS)}",
+            )
+    try:
+        cursor = parse_cursor(after) if after else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor; pass a next_cursor value")
+    
+    m = await reservation_measures(db)
+    
+    def filtered(query):
+        query = query.filter(m.model.status != 'cancelled', m.model.listing_id.isnot(None))
+        return apply_filters(query, start_date, end_date, source, listing_id, m.model)
+    
+    # Per-listing totals in Postgres, ranked so a page is a keyset range
+    totals = filtered(select(
+        m.model.listing_id,
+        m.bookings.label('bookings'),
+        m.revenue.label('revenue'),
+        m.nights.label('nights'),
+    )).group_by(m.model.listing_id).subquery()
+    revenue = func.coalesce(totals.c.revenue, 0)
+    ranked = select(
+        Listing.id,
+        Listing.name,
+        Listing.address,
+        Listing.bedrooms,
+        Listing.bathrooms,
+        Listing.property_type,
+        revenue.label('revenue'),
+        func.coalesce(totals.c.bookings, 0).label('bookings'),
+        func.coalesce(totals.c.nights, 0).label('nights'),
+    ).outerjoin(totals, totals.c.listing_id == Listing.id).filter(Listing.active == True)
+    if listing_id:
+        ranked = ranked.filter(Listing.id == listing_id)
+    if cursor:
+        after_revenue, after_id = cursor
+        ranked = ranked.filter(or_(revenue < after_revenue, and_(revenue == after_revenue, Listing.id > after_id)))
+    ranked = ranked.order_by(revenue.desc(), Listing.id)
+    if limit:
+        # One extra row tells whether another page follows
+        ranked = ranked.limit(limit + 1)
+    listings = (await db.execute(ranked)).all()
+    
+    next_cursor = None
+    if limit and len(listings) > limit:
+        listings = listings[:limit]
+        next_cursor = f"{int(listings[-1].revenue)}:{listings[-1].id}"
+    
     results = []
     for listing in listings:
-        months_data = listing_months.get(listing.id, {})
-
-        # Total revenue across all months
-        total_revenue = 0
-        total_bookings = 0
-        total_nights = 0
-
-        monthly = []
-        for month in sorted_months:
-            month_sources = months_data.get(month, {})
-            month_total_revenue = 0
-            month_total_bookings = 0
-            by_source = {}
-            for source in sorted_sources:
-                s_data = month_sources.get(source, {"bookings": 0, "revenue": 0, "nights": 0})
-                by_source[source] = {
-                    "bookings": s_data["bookings"],
-                    "revenue": s_data["revenue"],
-                }
-                month_total_revenue += s_data["revenue"]
-                month_total_bookings += s_data["bookings"]
-                total_nights += s_data["nights"]
-
-            total_revenue += month_total_revenue
-            total_bookings += month_total_bookings
-
-            # Only include months where this listing had activity
-            if month_total_bookings > 0:
-                monthly.append({
-                    "month": month,
-                    "total_revenue": month_total_revenue,
-                    "total_bookings": month_total_bookings,
-                    "by_source": by_source,
-                })
-
-        results.append({
+        result = {
             "id": listing.id,
             "name": listing.name,
             "address": listing.address,
             "bedrooms": listing.bedrooms,
             "bathrooms": listing.bathrooms,
             "property_type": listing.property_type,
-            "total_revenue": total_revenue,
-            "total_bookings": total_bookings,
-            "total_nights": total_nights,
-            "months": monthly,
-        })
-
-    # Sort by total revenue descending
-    results.sort(key=lambda x: x["total_revenue"], reverse=True)
-
-    return {
-        "listings": results,
-        "all_months": sorted_months,
-        "all_sources": sorted_sources,
-    }
+            "total_revenue": int(listing.revenue),
+            "total_bookings": int(listing.bookings),
+            "total_nights": int(listing.nights),
+        }
+        results.append({name: value for name, value in result.items() if name == "id" or name in selected})
+    
+    body = {"listings": results, "next_cursor": next_cursor}
+    if "months" not in selected:
+        return body
+    
+    # Monthly revenue by source, for this page's listings only
+    month = func.date_trunc('month', m.model.check_in)
+    monthly = filtered(select(
+        m.model.listing_id,
+        m.model.source,
+        month.label('month'),
+        m.bookings.label('bookings'),
+        m.revenue.label('revenue'),
+    )).group_by(m.model.listing_id, m.model.source, month)
+    if limit:
+        monthly = monthly.filter(m.model.listing_id.in_([listing.id for listing in listings]))
+    # Months and sources across every listing, so all pages share the same axes
+    axes = filtered(select(month.label('month'), m.model.source)).group_by(month, m.model.source)
+    monthly_rows, axis_rows = await asyncio.gather(
+        _fetch_all(monthly) if listings else asyncio.sleep(0, []),
+        _fetch_all(axes),
+    )
+    
+    # listing_id -> month -> source -> {bookings, revenue}
+    listing_months = defaultdict(lambda: defaultdict(dict))
+    for row in monthly_rows:
+        listing_months[row.listing_id][row.month.strftime("%Y-%m")][row.source] = {
+            "bookings": int(row.bookings),
+            "revenue": int(row.revenue),
+        }
+    sorted_months = sorted({row.month.strftime("%Y-%m") for row in axis_rows})
+    sorted_sources = sorted({row.source for row in axis_rows})
+    
+    for result in results:
+        months_data = listing_months.get(result["id"], {})
+        monthly_entries = []
+        # Only months where this listing had bookings
+        for month_str in sorted(months_data):
+            month_sources = months_data[month_str]
+            if sparse:
+                by_source = dict(sorted(month_sources.items()))
+            else:
+                by_source = {
+                    s: month_sources.get(s, {"bookings": 0, "revenue": 0})
+                    for s in sorted_sources
+                }
+            monthly_entries.append({
+                "month": month_str,
+                "total_revenue": sum(s["revenue"] for s in month_sources.values()),
+                "total_bookings": sum(s["bookings"] for s in month_sources.values()),
+                "by_source": by_source,
+            })
+        result["months"] = monthly_entries
+    
+    body["all_months"] = sorted_months
+    body["all_sources"] = sorted_sources
+    return body
 
 
 @router.get("/listings")
-async def get_listings(db: Session = Depends(get_db)):
+@cached_result(normalize_param)
+async def get_listings(db: AsyncSession = Depends(get_async_db)):
     """Get list of available listings."""
-    listings = db.query(Listing).filter(Listing.active == True).all()
+    listings = (await db.scalars(select(Listing).filter(Listing.active == True))).all()
     return {
         "listings": [
             {"id": l.id, "guesty_id": l.guesty_id, "name": l.name}
@@ -451,7 +828,15 @@ async def get_listings(db: Session = Depends(get_db)):
 
 
 @router.get("/sources")
-async def get_sources(db: Session = Depends(get_db)):
+@cached_result(normalize_param)
+async def get_sources(db: AsyncSession = Depends(get_async_db)):
     """Get list of booking sources."""
-    sources = db.query(Reservation.source).distinct().all()
+    m = await reservation_measures(db)
+    sources = (await db.execute(select(m.model.source).distinct())).all()
     return {"sources": [s.source for s in sources if s.source]}
+
+
+@router.get("/cache-stats")
+async def get_cache_stats():
+    """Get hit/miss counters of the analytics result cache."""
+    return analytics_cache.stats()
@@ -0,0 +1,104 @@
+"""Bulk export endpoints streaming CSV or Parquet files."""
+
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, cast, select, BigInteger, Date
+
+from app.database.connection import get_async_db
+from app.database.models import Reservation, Listing
+from app.routes.analytics import apply_filters, parse_date, reservation_measures
+from app.services.exports import ENCODERS, MEDIA_TYPES, parquet_available
+
+router = APIRouter(prefix="/api/exports", tags=["exports"])
+
+FORMAT_PATTERN = f"^({'|'.join(ENCODERS)})$"
+
+
+def _check_dates(*values: Optional[str]):
+    """Reject malformed date filters before the streaming response starts."""
+    for value in values:
+        try:
+            parse_date(value)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid date {value!r}; use YYYY-MM-DD")
+
+
+def _export_response(statement, name: str, export_format: str) -> StreamingResponse:
+    """Stream ``statement``'s rows as a downloadable file."""
+    if export_format == "parquet" and not parquet_available():
+        raise HTTPException(status_code=501, detail="Parquet exports need the pyarrow package installed")
+    return StreamingResponse(
+        ENCODERS[export_format](statement),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{export_format}"'},
+    )
+
+
+@router.get("/reservations")
+async def export_reservations(
+    start_date: Optional[str] = Query(None),
+    end_date: Optional[str] = Query(None),
+    source: Optional[str] = Query(None),
+    listing_id: Optional[str] = Query(None),
+    format: str = Query("csv", pattern=FORMAT_PATTERN),
+):
+    """
+    Export reservations, one row each, ordered by check-in.
+    
+    Rows are read from a server-side cursor and written out a chunk at a
+    time, so memory use does not grow with the number of reservations.
+    """
+    _check_dates(start_date, end_date)
+    statement = select(
+        Reservation.id,
+        Reservation.guesty_id,
+        Reservation.listing_id,
+        Reservation.source,
+        Reservation.status,
+        Reservation.check_in,
+        Reservation.check_out,
+        Reservation.booked_at,
+        Reservation.cancelled_at,
+        Reservation.nights,
+        Reservation.lead_time_days,
+        Reservation.total_price.label('total_price_cents'),
+    )
+    statement = apply_filters(statement, start_date, end_date, source, listing_id)
+    statement = statement.order_by(Reservation.check_in, Reservation.id)
+    return _export_response(statement, "reservations", format)
+
+
+@router.get("/listing-performance")
+async def export_listing_performance(
+    start_date: Optional[str] = Query(None),
+    end_date: Optional[str] = Query(None),
+    source: Optional[str] = Query(None),
+    listing_id: Optional[str] = Query(None),
+    format: str = Query("csv", pattern=FORMAT_PATTERN),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Export non-cancelled bookings, revenue and nights per listing, month and source.
+    
+    One row per combination with bookings (long format), ordered by
+    listing, month and source; amounts are in cents.
+    """
+    _check_dates(start_date, end_date)
+    m = await reservation_measures(db)
+    month = cast(func.date_trunc('month', m.model.check_in), Date)
+    statement = select(
+        m.model.listing_id,
+        Listing.name.label('listing_name'),
+        month.label('month'),
+        m.model.source,
+        cast(m.bookings, BigInteger).label('bookings'),
+        cast(m.revenue, BigInteger).label('revenue_cents'),
+        cast(m.nights, BigInteger).label('nights'),
+    ).join(Listing, Listing.id == m.model.listing_id).filter(m.model.status != 'cancelled')
+    statement = apply_filters(statement, start_date, end_date, source, listing_id, m.model)
+    statement = statement.group_by(
+        m.model.listing_id, Listing.name, month, m.model.source
+    ).order_by(m.model.listing_id, month, m.model.source)
+    return _export_response(statement, "listing_performance", format)
@@ -1,10 +1,10 @@
 """Health check endpoints."""
 
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 
-from app.database.connection import get_db
+from app.database.connection import get_async_db
 
 router = APIRouter(prefix="/api/health", tags=["health"])
 
@@ -16,10 +16,10 @@ async def health_check():
 
 
 @router.get("/db")
-async def database_health(db: Session = Depends(get_db)):
+async def database_health(db: AsyncSession = Depends(get_async_db)):
     """Check database connectivity."""
     try:
-        db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 1"))
         return {"status": "healthy", "database": "connected"}
     except Exception as e:
         return {"status": "unhealthy", "database": "disconnected", "error": str(e)}
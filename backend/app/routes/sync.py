@@ -1,44 +1,221 @@
 """Sync endpoints for triggering and monitoring data sync."""
 
-from fastapi import APIRouter, Depends, BackgroundTasks
+import json
+from typing import Optional
+from fastapi import APIRouter, Depends, BackgroundTasks, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import desc
 
+from app.config import get_settings
 from app.database.connection import get_db
-from app.database.models import SyncLog
+from app.database.models import SyncJob, SyncLog, SyncStageMetric, SyncWindow
+from app.jobs.lease import SYNC_LEASE, lease_held
 
+settings = get_settings()
 router = APIRouter(prefix="/api/sync", tags=["sync"])
 
 
-@router.post("/trigger")
-async def trigger_sync(
+def _already_running(db: Session) -> Optional[dict]:
+    """Response for a trigger while another process holds the sync lease, else None."""
+    if not lease_held(SYNC_LEASE):
+        return None
+    
+    running = db.query(SyncLog).filter(
+        SyncLog.status == "running"
+    ).order_by(desc(SyncLog.started_at)).first()
+    return {
+        "status": "already_running",
+        "message": "A sync is already in progress",
+        "sync_id": running.id if running else None,
+    }
+
+
+def _start_job(
+    db: Session,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
-):
-    """Trigger a manual data sync from Guesty."""
+    kind: str,
+    mode: str,
+    message: str,
+    **params,
+) -> dict:
+    """Queue a sync job for the worker, or run it in this process's background tasks."""
     # Import here to avoid circular imports
-    from app.services.sync import run_full_sync
+    from app.jobs.queue import enqueue_job, job_handlers
     
-    # Check if sync is already running
-    running = db.query(SyncLog).filter(SyncLog.status == "running").first()
-    if running:
+    if settings.sync_worker_enabled:
+        job = enqueue_job(db, kind, **params)
         return {
-            "status": "already_running",
-            "message": "A sync is already in progress",
-            "sync_id": running.id,
+            "status": "queued",
+            "mode": mode,
+            "job_id": job.id,
+            "message": "Sync queued for the worker",
         }
     
+    background_tasks.add_task(job_handlers()[kind], **params)
+    return {
+        "status": "started",
+        "mode": mode,
+        "message": message,
+    }
+
+
+@router.post("/trigger")
+def trigger_sync(
+    background_tasks: BackgroundTasks,
+    incremental: bool = Query(False, description="Only sync changes since the last run instead of re-downloading everything"),
+    resume: bool = Query(False, description="Continue the last failed sync from its page checkpoints"),
+    db: Session = Depends(get_db),
+):
+    """Trigger a manual data sync from Guesty."""
+    already_running = _already_running(db)
+    if already_running:
+        return already_running
+    
     # Start sync in background
-    background_tasks.add_task(run_full_sync)
+    if resume:
+        mode = "resume"
+    else:
+        mode = "incremental" if incremental else "full"
+    
+    return _start_job(db, background_tasks, mode, mode, "Sync started in background")
+
+
+@router.post("/backfill")
+def trigger_backfill(
+    background_tasks: BackgroundTasks,
+    retry_sync_id: Optional[int] = Query(None, description="Re-run only the unfinished windows of this backfill"),
+    db: Session = Depends(get_db),
+):
+    """Trigger a date-window sharded reservations backfill."""
+    already_running = _already_running(db)
+    if already_running:
+        return already_running
+    
+    if retry_sync_id is not None:
+        previous = db.get(SyncLog, retry_sync_id)
+        if previous is None or previous.entity_type != "reservations_backfill":
+            raise HTTPException(status_code=404, detail="Backfill not found")
+    
+    return _start_job(
+        db, background_tasks, "backfill", "reservations_backfill",
+        "Backfill started in background", retry_sync_id=retry_sync_id,
+    )
+
+
+@router.post("/replay")
+def trigger_replay(
+    background_tasks: BackgroundTasks,
+    sync_id: int = Query(..., description="Run whose landed API pages are reloaded"),
+    db: Session = Depends(get_db),
+):
+    """Re-run transformation and loading from a previous run's landed pages, offline."""
+    already_running = _already_running(db)
+    if already_running:
+        return already_running
+    
+    if db.get(SyncLog, sync_id) is None:
+        raise HTTPException(status_code=404, detail="Sync run not found")
+    
+    return _start_job(
+        db, background_tasks, "replay", "replay",
+        f"Replay of sync {sync_id} started in background", sync_log_id=sync_id,
+    )
+
+
+@router.get("/jobs/{job_id}")
+def get_sync_job(job_id: int, db: Session = Depends(get_db)):
+    """Get the state of a sync job queued for the worker."""
+    job = db.get(SyncJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Sync job not found")
     
     return {
-        "status": "started",
-        "message": "Sync started in background",
+        "id": job.id,
+        "kind": job.kind,
+        "params": json.loads(job.params) if job.params else {},
+        "status": job.status,
+        "worker": job.worker,
+        "enqueued_at": job.enqueued_at.isoformat(),
+        "run_after": job.run_after.isoformat() if job.run_after else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "completed_at": job.completed_at.isoformat() if job.completed_at else None,
+        "error_message": job.error_message,
+    }
+
+
+@router.get("/runs/{sync_id}/windows")
+def get_sync_windows(sync_id: int, db: Session = Depends(get_db)):
+    """Get per-window progress of a sharded backfill."""
+    windows = db.query(SyncWindow).filter(
+        SyncWindow.sync_log_id == sync_id
+    ).order_by(SyncWindow.window_start).all()
+    
+    return {
+        "sync_id": sync_id,
+        "windows": [
+            {
+                "id": w.id,
+                "entity_type": w.entity_type,
+                "window_start": w.window_start.isoformat(),
+                "window_end": w.window_end.isoformat() if w.window_end else None,
+                "status": w.status,
+                "records_synced": w.records_synced,
+                "started_at": w.started_at.isoformat() if w.started_at else None,
+                "completed_at": w.completed_at.isoformat() if w.completed_at else None,
+                "error_message": w.error_message,
+            }
+            for w in windows
+        ],
+    }
+
+
+@router.get("/runs/{sync_id}/metrics")
+def get_sync_metrics(sync_id: int, db: Session = Depends(get_db)):
+    """Get per-entity fetch, transform and write throughput of a sync run."""
+    if db.get(SyncLog, sync_id) is None:
+        raise HTTPException(status_code=404, detail="Sync run not found")
+    
+    metrics = db.query(SyncStageMetric).filter(
+        SyncStageMetric.sync_log_id == sync_id
+    ).order_by(SyncStageMetric.id).all()
+    
+    return {
+        "sync_id": sync_id,
+        "stages": [
+            {
+                "entity_type": m.entity_type,
+                "sync_window_id": m.sync_window_id,
+                "status": m.status,
+                "elapsed_seconds": m.elapsed_seconds,
+                "fetch": {
+                    "pages": m.pages_fetched,
+                    "requests": m.requests,
+                    "retries": m.retries,
+                    "rate_limited": m.rate_limited,
+                    "bytes_received": m.bytes_received,
+                    "latency_p50_ms": m.api_latency_p50_ms,
+                    "latency_p95_ms": m.api_latency_p95_ms,
+                    "throttle_seconds": m.throttle_seconds,
+                },
+                "transform": {
+                    "rows": m.rows_transformed,
+                    "seconds": m.transform_seconds,
+                    "rows_per_second": m.transform_rows_per_second,
+                },
+                "write": {
+                    "rows": m.rows_written,
+                    "seconds": m.write_seconds,
+                    "commits": m.commits,
+                    "commit_seconds": m.commit_seconds,
+                },
+            }
+            for m in metrics
+        ],
     }
 
 
 @router.get("/status")
-async def get_sync_status(db: Session = Depends(get_db)):
+def get_sync_status(db: Session = Depends(get_db)):
     """Get the status of the last sync operation."""
     # Get most recent sync log
     last_sync = db.query(SyncLog).order_by(desc(SyncLog.started_at)).first()
@@ -53,6 +230,9 @@ async def get_sync_status(db: Session = Depends(get_db)):
         "status": last_sync.status,
         "entity_type": last_sync.entity_type,
         "records_synced": last_sync.records_synced,
+        "records_inserted": last_sync.records_inserted,
+        "records_updated": last_sync.records_updated,
+        "records_unchanged": last_sync.records_unchanged,
         "started_at": last_sync.started_at.isoformat() if last_sync.started_at else None,
         "completed_at": last_sync.completed_at.isoformat() if last_sync.completed_at else None,
         "error_message": last_sync.error_message,
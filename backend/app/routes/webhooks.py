@@ -0,0 +1,49 @@
+"""Webhook receivers for real-time Guesty updates."""
+
+import json
+
+from fastapi import APIRouter, HTTPException, Request
+
+from app.config import get_settings
+
+router = APIRouter(prefix="/api/webhooks", tags=["webhooks"])
+settings = get_settings()
+
+
+@router.post("/guesty")
+async def receive_guesty_webhook(request: Request):
+    """Queue a Guesty listing, reservation or conversation event for the next micro-batch."""
+    # Import here to avoid circular imports
+    from app.services.sync.webhooks import verify_signature, webhook_buffer
+    
+    # Unsigned writes to the synced tables are never accepted
+    if not settings.guesty_webhook_secret:
+        raise HTTPException(status_code=503, detail="Webhook receiver is not configured; set GUESTY_WEBHOOK_SECRET")
+    
+    body = await request.body()
+    if not verify_signature(body, request.headers):
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
+    
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="Expected a JSON object")
+    
+    queued = webhook_buffer.add(payload)
+    
+    return {
+        "status": "queued" if queued else "ignored",
+        "event": payload.get("event"),
+        "queued": queued,
+    }
+
+
+@router.get("/guesty/stats")
+async def get_webhook_stats():
+    """Get counts of received, written and pending webhook records."""
+    # Import here to avoid circular imports
+    from app.services.sync.webhooks import webhook_buffer
+    
+    return webhook_buffer.stats()
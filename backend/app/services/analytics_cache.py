@@ -0,0 +1,200 @@
+"""In-process cache of analytics results, versioned by the data generation."""
+
+import functools
+import hashlib
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException, Request, Response
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.database.models import DATA_GENERATION
+
+settings = get_settings()
+
+
+class _Generation:
+    """
+    The data generation: last value of the ``data_generation_seq`` sequence.
+    
+    Every successful write calls ``advance``, so results cached under an
+    older generation are never served again. Sync ids would not do: a
+    resumed or retried run keeps its old id, which newer runs have passed.
+    It is re-read from Postgres at most every
+    ``analytics_generation_ttl_seconds``, which bounds how long a write by
+    another process (e.g. the worker) goes unnoticed; ``advance`` has it
+    re-read at once in this process.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value: Optional[int] = None
+        self._read_at = 0.0
+    
+    async def get(self, db: AsyncSession) -> int:
+        with self._lock:
+            if self._value is not None and time.monotonic() - self._read_at < settings.analytics_generation_ttl_seconds:
+                return self._value
+        
+        value = await db.scalar(select(text("last_value")).select_from(text(DATA_GENERATION.name)))
+        with self._lock:
+            self._value = value
+            self._read_at = time.monotonic()
+        return value
+    
+    def expire(self):
+        with self._lock:
+            self._value = None
+    
+    def advance(self, db: Session):
+        """Start a new generation once a write has been committed."""
+        db.execute(select(DATA_GENERATION.next_value()))
+        db.commit()
+        self.expire()
+
+
+data_generation = _Generation()
+
+
+class ResultCache:
+    """Thread-safe LRU cache of endpoint results with hit/miss counters."""
+    
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.generation: Optional[int] = None
+        self._entries: OrderedDict[tuple, Any] = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def use_generation(self, generation: int):
+        """Drop every entry once the data generation has moved on."""
+        with self._lock:
+            if generation != self.generation:
+                self._entries.clear()
+                self.generation = generation
+    
+    def get(self, key: tuple) -> tuple[bool, Any]:
+        """Return (found, value), counting a hit or a miss."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key]
+            self.misses += 1
+            return False, None
+    
+    def put(self, key: tuple, value: Any):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "generation": self.generation,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0,
+            }
+
+
+analytics_cache = ResultCache(settings.analytics_cache_size)
+
+
+def cache_params(params: dict, normalize: Optional[Callable[[str, Any], Any]] = None) -> str:
+    """
+    Canonical form of an endpoint's query parameters.
+    
+    Unset parameters are dropped, so omitting a filter and passing it empty
+    share one entry; ``normalize(name, value)`` can canonicalize the rest.
+    
+    Raises:
+        ValueError: If ``normalize`` rejects a value, prefixed with its name
+    """
+    canonical = {}
+    for name, value in params.items():
+        if value is None or value == "":
+            continue
+        try:
+            canonical[name] = normalize(name, value) if normalize else value
+        except ValueError as e:
+            raise ValueError(f"{name}: {e}")
+    return json.dumps(canonical, sort_keys=True, default=str)
+
+
+def etag_for(key: tuple) -> str:
+    """Strong ETag for a cache key; it changes with the parameters or the generation."""
+    return '"' + hashlib.sha1(json.dumps(key, default=str).encode()).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an ``If-None-Match`` header lists ``etag`` (weak comparison, as RFC 9110 asks)."""
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+def cached_result(normalize: Optional[Callable[[str, Any], Any]] = None):
+    """
+    Cache an async endpoint's result by (endpoint, parameters, data generation).
+    
+    The endpoint must take its session as the ``db`` keyword. Repeat calls
+    within a generation return the stored result without any query.
+    Responses carry an ETag of the same key, and a request whose
+    ``If-None-Match`` already has it gets an empty 304. A parameter that
+    ``normalize`` rejects with ValueError gets a 400.
+    """
+    def decorator(endpoint):
+        signature = inspect.signature(endpoint)
+        
+        @functools.wraps(endpoint)
+        async def wrapper(*args, request: Request, response: Response, **kwargs):
+            db = kwargs["db"]
+            params = {name: value for name, value in kwargs.items() if name != "db"}
+            generation = await data_generation.get(db)
+            try:
+                key = (endpoint.__name__, cache_params(params, normalize), generation)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=f"Invalid parameter {e}")
+            
+            etag = etag_for(key)
+            headers = {"ETag": etag, "Cache-Control": "no-cache"}
+            if etag_matches(request.headers.get("If-None-Match"), etag):
+                return Response(status_code=304, headers=headers)
+            response.headers.update(headers)
+            
+            analytics_cache.use_generation(generation)
+            found, result = analytics_cache.get(key)
+            if not found:
+                result = await endpoint(*args, **kwargs)
+                analytics_cache.put(key, result)
+            return result
+        
+        # FastAPI reads the signature: the endpoint's parameters plus request and response
+        wrapper.__signature__ = signature.replace(parameters=[
+            *signature.parameters.values(),
+            inspect.Parameter("request", inspect.Parameter.KEYWORD_ONLY, annotation=Request),
+            inspect.Parameter("response", inspect.Parameter.KEYWORD_ONLY, annotation=Response),
+        ])
+        return wrapper
+    return decorator
@@ -0,0 +1,144 @@
+"""SQL-side histograms and percentiles of per-reservation values."""
+
+import math
+from typing import Callable, Optional
+
+from sqlalchemy import Float, cast, func, select
+from sqlalchemy.dialects.postgresql import ARRAY, array
+
+from app.database.models import Reservation
+
+# Percentiles reported with every distribution
+PERCENTILES = (0.5, 0.9, 0.99)
+
+# Most bucket edges a caller may ask for
+MAX_EDGES = 100
+
+
+class DistributionMetric:
+    """
+    A per-reservation value whose distribution can be requested.
+    
+    Buckets are half-open ranges between consecutive edges, the last one
+    open-ended; values below the first edge are not counted.
+    """
+    
+    def __init__(self, name: str, value, default_edges: list[float], integer: bool = True,
+                 default_labels: Optional[list[str]] = None):
+        self.name = name
+        self.value = value
+        self.default_edges = default_edges
+        self.integer = integer
+        self.default_labels = default_labels
+    
+    def labels(self, edges: list[float]) -> list[str]:
+        if edges == self.default_edges and self.default_labels:
+            return self.default_labels
+        labels = []
+        for low, high in zip(edges, edges[1:]):
+            # Integer values fit inclusive labels, e.g. 8-14 for [8, 15)
+            upper = high - 1 if self.integer else high
+            labels.append(f"{_number(low)}-{_number(upper)}")
+        labels.append(f"{_number(edges[-1])}+")
+        return labels
+
+
+def _number(value: float):
+    return int(value) if float(value).is_integer() else value
+
+
+METRICS = {
+    "lead_time": DistributionMetric(
+        "lead_time",
+        Reservation.lead_time_days,
+        [0, 8, 15, 31, 61, 91],
+        default_labels=["0-7", "8-14", "15-30", "31-60", "61-90", "90+"],
+    ),
+    "nights": DistributionMetric(
+        "nights",
+        Reservation.nights,
+        [1, 2, 3, 4, 5, 7, 14, 28],
+    ),
+    # In cents, like every other amount the API returns
+    "price_per_night": DistributionMetric(
+        "price_per_night",
+        cast(Reservation.total_price, Float) / cast(func.nullif(Reservation.nights, 0), Float),
+        [0, 5000, 10000, 15000, 20000, 30000, 50000],
+        integer=False,
+    ),
+}
+
+
+def parse_edges(edges: Optional[str], metric: DistributionMetric) -> list[float]:
+    """
+    Parse comma-separated bucket edges, or return the metric's defaults.
+    
+    Raises:
+        ValueError: If the edges are not finite numbers in strictly increasing order
+    """
+    if not edges:
+        return metric.default_edges
+    parsed = [_number(float(edge)) for edge in edges.split(",") if edge.strip()]
+    if not parsed or len(parsed) > MAX_EDGES:
+        raise ValueError(f"Between 1 and {MAX_EDGES} bucket edges are required")
+    if not all(math.isfinite(edge) for edge in parsed):
+        raise ValueError("Bucket edges must be finite numbers")
+    if any(low >= high for low, high in zip(parsed, parsed[1:])):
+        raise ValueError("Bucket edges must be strictly increasing")
+    return parsed
+
+
+def distribution_statements(metric: DistributionMetric, edges: list[float], filter_query: Callable):
+    """
+    Build the statements of a metric's distribution over non-cancelled reservations.
+    
+    Both aggregate in Postgres, so only one row per bucket and one row of
+    percentiles come back, whatever the number of reservations.
+    
+    Args:
+        metric: Value to bucket
+        edges: Strictly increasing bucket edges
+        filter_query: Applies the request's filters to a select on reservations
+    
+    Returns:
+        Tuple of (bucket counts statement, count and percentiles statement)
+    """
+    value = cast(metric.value, Float)
+    conditions = [Reservation.status != 'cancelled', metric.value.isnot(None)]
+    
+    bucket = func.width_bucket(value, cast(array([float(edge) for edge in edges]), ARRAY(Float)))
+    buckets = filter_query(
+        select(bucket.label('bucket'), func.count().label('total')).filter(*conditions)
+    ).group_by(bucket)
+    
+    percentiles = filter_query(select(
+        func.count().label('total'),
+        *[func.percentile_cont(q).within_group(value) for q in PERCENTILES],
+    ).filter(*conditions))
+    return buckets, percentiles
+
+
+def shape_distribution(metric: DistributionMetric, edges: list[float], bucket_rows, percentile_row) -> dict:
+    """Response body from the rows of ``distribution_statements``."""
+    # width_bucket numbers [edges[i], edges[i + 1]) as i + 1; 0 is below the first edge
+    counts = {int(row.bucket): int(row.total) for row in bucket_rows}
+    buckets = [
+        {
+            "range": label,
+            "min": low,
+            "max": edges[i + 1] if i + 1 < len(edges) else None,
+            "count": counts.get(i + 1, 0),
+        }
+        for i, (low, label) in enumerate(zip(edges, metric.labels(edges)))
+    ]
+    
+    values = list(percentile_row)[1:]
+    return {
+        "metric": metric.name,
+        "count": int(percentile_row.total or 0),
+        "buckets": buckets,
+        "percentiles": {
+            f"p{round(q * 100)}": round(value, 2) if value is not None else None
+            for q, value in zip(PERCENTILES, values)
+        },
+    }
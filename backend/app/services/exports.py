@@ -0,0 +1,135 @@
+"""Streaming CSV and Parquet encoding of query results."""
+
+import csv
+import io
+from datetime import date, datetime
+from typing import AsyncIterator
+
+from sqlalchemy import BigInteger, Boolean, Date, DateTime, Float, Integer, Numeric
+
+from app.database.connection import AsyncSessionLocal
+
+# Rows fetched from the server-side cursor, and encoded, at a time
+EXPORT_CHUNK_ROWS = 5000
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def parquet_available() -> bool:
+    """Whether pyarrow, which Parquet exports need, is installed."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _arrow_type(column_type):
+    """Arrow type of a SQLAlchemy column type; anything unlisted is written as text."""
+    import pyarrow as pa
+    
+    if isinstance(column_type, (Integer, BigInteger)):
+        return pa.int64()
+    if isinstance(column_type, (Float, Numeric)):
+        return pa.float64()
+    if isinstance(column_type, Boolean):
+        return pa.bool_()
+    if isinstance(column_type, DateTime):
+        return pa.timestamp("us")
+    if isinstance(column_type, Date):
+        return pa.date32()
+    return pa.string()
+
+
+class _Chunks(io.RawIOBase):
+    """Write-only file whose written bytes are taken out with ``drain``."""
+    
+    def __init__(self):
+        self._chunks: list[bytes] = []
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+    
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+async def stream_rows(statement) -> AsyncIterator[list]:
+    """
+    Yield a statement's rows a chunk at a time from a server-side cursor.
+    
+    The statement runs on its own session, since the request's session is
+    closed before a streaming response body is sent.
+    """
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(statement.execution_options(yield_per=EXPORT_CHUNK_ROWS))
+        async for rows in result.partitions():
+            yield rows
+
+
+async def encode_csv(statement) -> AsyncIterator[bytes]:
+    """A header line, then the statement's rows as CSV, one chunk at a time."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.name for column in statement.selected_columns])
+    
+    async for rows in stream_rows(statement):
+        writer.writerows([_csv_value(value) for value in row] for row in rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    
+    # The header alone when there are no rows
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+async def encode_parquet(statement) -> AsyncIterator[bytes]:
+    """
+    The statement's rows as a Parquet file, one row group per chunk.
+    
+    Each row group's bytes are sent as soon as it is written; the footer
+    follows the last one.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    schema = pa.schema([
+        (column.name, _arrow_type(column.type)) for column in statement.selected_columns
+    ])
+    sink = _Chunks()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        async for rows in stream_rows(statement):
+            columns = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema,
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+ENCODERS = {
+    "csv": encode_csv,
+    "parquet": encode_parquet,
+}
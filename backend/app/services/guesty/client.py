@@ -1,70 +1,138 @@
 """Guesty API client with OAuth 2.0 authentication."""
 
+import asyncio
+import json
+import threading
 import time
 import logging
-from typing import Optional, Any
+from collections import deque
+from typing import Optional, Any, AsyncIterator, Callable, Iterator
 import httpx
 
 from app.config import get_settings
+from app.services.guesty.rate_limiter import backoff_delay, get_rate_limiter, rate_limit_delay
+from app.services.guesty.stats import RequestStats
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
 
-class GuestyClient:
-    """HTTP client for Guesty Open API with OAuth 2.0 authentication."""
+class GuestyToken:
+    """
+    OAuth access token cache shared by the sync and async clients.
+    
+    Every client in every thread (page fetch event loops, backfill workers)
+    goes through ``get``, which lets only one of them fetch a token at a time.
+    """
     
     def __init__(self):
-        self._access_token: Optional[str] = None
-        self._token_expiry: float = 0
-        self._client = httpx.Client(timeout=30.0)
+        self.access_token: Optional[str] = None
+        self.expiry: float = 0
+        self._lock = threading.Lock()
     
-    def _get_token(self) -> str:
-        """Get or refresh OAuth access token."""
-        # Check if token is still valid (with 5-minute buffer)
-        if self._access_token and time.time() < (self._token_expiry - 300):
-            return self._access_token
-        
-        logger.info("Fetching new Guesty access token")
-        
-        response = self._client.post(
-            settings.guesty_token_url,
-            data={
+    def is_valid(self) -> bool:
+        """Check if token is still valid (with 5-minute buffer)."""
+        return bool(self.access_token) and time.time() < (self.expiry - 300)
+    
+    def get(self, fetch: Callable[[], httpx.Response]) -> str:
+        """Return a valid token, calling ``fetch`` for a token response only if there is none."""
+        if self.is_valid():
+            return self.access_token
+        with self._lock:
+            # Another thread may have fetched one while this one waited
+            if self.is_valid():
+                return self.access_token
+            logger.info("Fetching new Guesty access token")
+            return self.store(fetch())
+    
+    def invalidate(self, access_token: str):
+        """Force a new token after ``access_token`` was rejected, unless it was already replaced."""
+        with self._lock:
+            if self.access_token == access_token:
+                self.access_token = None
+    
+    @staticmethod
+    def request_kwargs() -> dict:
+        """Arguments for the client-credentials token request."""
+        return {
+            "url": settings.guesty_token_url,
+            "data": {
                 "grant_type": "client_credentials",
                 "client_id": settings.guesty_client_id,
                 "client_secret": settings.guesty_client_secret,
                 "scope": "open-api",
             },
-            headers={"Content-Type": "application/x-www-form-urlencoded"},
-        )
-        
+            "headers": {"Content-Type": "application/x-www-form-urlencoded"},
+        }
+    
+    def store(self, response: httpx.Response) -> str:
+        """Store the token from a token endpoint response."""
         if response.status_code != 200:
             logger.error(f"Failed to get Guesty token: {response.text}")
             raise Exception(f"Failed to get Guesty access token: {response.status_code}")
         
         data = response.json()
-        self._access_token = data["access_token"]
-        self._token_expiry = time.time() + data.get("expires_in", 86400)
+        self.access_token = data["access_token"]
+        self.expiry = time.time() + data.get("expires_in", 86400)
         
         logger.info("Successfully obtained Guesty access token")
-        return self._access_token
+        return self.access_token
+
+
+# Guesty caps how many tokens may be issued per day, so every client shares one
+_token = GuestyToken()
+
+
+def _list_params(skip: int, limit: int, filters: Optional[list]) -> dict:
+    """Build query params for a paginated collection endpoint."""
+    params = {"skip": skip, "limit": limit}
+    if filters:
+        params["filters"] = json.dumps(filters)
+    return params
+
+
+class GuestyClient:
+    """HTTP client for Guesty Open API with OAuth 2.0 authentication."""
+    
+    def __init__(self):
+        self._token = _token
+        self._limiter = get_rate_limiter()
+        self._client = httpx.Client(timeout=30.0)
+    
+    def _get_token(self) -> str:
+        """Get or refresh OAuth access token."""
+        return self._token.get(lambda: self._client.post(**GuestyToken.request_kwargs()))
+    
+    def authenticate(self):
+        """Fetch the shared access token now, unless a valid one is cached."""
+        self._get_token()
     
     def _make_request(
-        self, 
-        method: str, 
-        endpoint: str, 
+        self,
+        method: str,
+        endpoint: str,
         params: Optional[dict] = None,
         json_data: Optional[dict] = None,
-        retries: int = 3,
+        retries: Optional[int] = None,
+        stats: Optional[RequestStats] = None,
     ) -> Any:
-        """Make authenticated request to Guesty API with retry logic."""
+        """
+        Make authenticated request to Guesty API with rate limiting and retry logic.
+        
+        Latency, size, retries and throttling of every attempt are added to
+        ``stats`` when given.
+        """
         url = f"{settings.guesty_base_url}{endpoint}"
+        token = self._get_token()
         headers = {
-            "Authorization": f"Bearer {self._get_token()}",
+            "Authorization": f"Bearer {token}",
             "Content-Type": "application/json",
         }
+        retries = retries or settings.guesty_max_retries
         
         for attempt in range(retries):
+            waited = self._limiter.acquire()
+            started = time.perf_counter()
             try:
                 response = self._client.request(
                     method=method,
@@ -73,74 +141,379 @@ class GuestyClient:
                     params=params,
                     json=json_data,
                 )
+                self._limiter.observe(response.headers)
+                if stats is not None:
+                    stats.record_wait(waited)
+                    stats.record_response(time.perf_counter() - started, len(response.content), attempt)
                 
                 if response.status_code == 401:
-                    # Token expired, refresh and retry
-                    self._access_token = None
-                    headers["Authorization"] = f"Bearer {self._get_token()}"
+                    # Token expired, refresh and retry; a parallel request may have already
+                    self._token.invalidate(token)
+                    token = self._get_token()
+                    headers["Authorization"] = f"Bearer {token}"
                     continue
                 
                 if response.status_code == 429:
-                    # Rate limited, exponential backoff
-                    wait_time = 2 ** attempt
-                    logger.warning(f"Rate limited, waiting {wait_time}s before retry")
-                    time.sleep(wait_time)
+                    # Rate limited: hold back every request path, not just this one
+                    wait_time = rate_limit_delay(response, attempt)
+                    logger.warning(f"Rate limited, pausing requests for {wait_time:.1f}s")
+                    self._limiter.pause(wait_time)
+                    if stats is not None:
+                        stats.record_rate_limited()
                     continue
                 
                 response.raise_for_status()
                 return response.json()
-                
+            
             except httpx.HTTPError as e:
                 logger.error(f"HTTP error on attempt {attempt + 1}: {e}")
+                if stats is not None:
+                    stats.record_error(attempt)
                 if attempt == retries - 1:
                     raise
-                time.sleep(2 ** attempt)
+                delay = backoff_delay(attempt)
+                if stats is not None:
+                    stats.record_wait(delay)
+                time.sleep(delay)
         
-        return None
+        raise Exception(f"Guesty request to {endpoint} still rate limited after {retries} attempts")
     
-    def get_listings(self, skip: int = 0, limit: int = 100) -> dict:
+    def _list(
+        self,
+        endpoint: str,
+        skip: int,
+        limit: int,
+        filters: Optional[list] = None,
+        stats: Optional[RequestStats] = None,
+    ) -> dict:
+        """Fetch one page of a paginated collection endpoint."""
+        return self._make_request("GET", endpoint, params=_list_params(skip, limit, filters), stats=stats)
+    
+    def get_listings(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[list] = None,
+        stats: Optional[RequestStats] = None,
+    ) -> dict:
         """Fetch listings from Guesty."""
-        return self._make_request(
-            "GET", 
-            "/listings",
-            params={"skip": skip, "limit": limit},
-        )
+        return self._list("/listings", skip, limit, filters, stats)
     
     def get_reservations(
-        self, 
-        skip: int = 0, 
+        self,
+        skip: int = 0,
         limit: int = 100,
         filters: Optional[list] = None,
+        stats: Optional[RequestStats] = None,
     ) -> dict:
         """Fetch reservations from Guesty."""
-        params = {"skip": skip, "limit": limit}
-        if filters:
-            import json
-            params["filters"] = json.dumps(filters)
-        
-        return self._make_request("GET", "/reservations", params=params)
+        return self._list("/reservations", skip, limit, filters, stats)
     
-    def get_guests(self, skip: int = 0, limit: int = 100) -> dict:
+    def get_guests(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[list] = None,
+        stats: Optional[RequestStats] = None,
+    ) -> dict:
         """Fetch guests from Guesty."""
-        return self._make_request(
-            "GET",
-            "/guests",
-            params={"skip": skip, "limit": limit},
-        )
+        return self._list("/guests", skip, limit, filters, stats)
     
-    def get_conversations(self, skip: int = 0, limit: int = 100) -> dict:
+    def get_conversations(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[list] = None,
+        stats: Optional[RequestStats] = None,
+    ) -> dict:
         """Fetch conversations from Guesty."""
-        return self._make_request(
-            "GET",
-            "/communication/conversations",
-            params={"skip": skip, "limit": limit},
-        )
+        return self._list("/communication/conversations", skip, limit, filters, stats)
+    
+    def iter_pages(
+        self,
+        getter: str,
+        filters: Optional[list] = None,
+        limit: int = 100,
+        start_skip: int = 0,
+        stats: Optional[RequestStats] = None,
+    ) -> Iterator[list[dict]]:
+        """
+        Yield the result pages of a collection one request at a time.
+        
+        Args:
+            getter: Name of the page getter, e.g. "get_reservations"
+            filters: Guesty filters applied to every page
+            limit: Page size
+            start_skip: Offset of the first page, e.g. a resume checkpoint
+            stats: Collects request statistics when given
+        """
+        fetch = getattr(self, getter)
+        skip = start_skip
+        
+        while True:
+            items = fetch(skip=skip, limit=limit, filters=filters, stats=stats).get("results", [])
+            if not items:
+                break
+            
+            yield items
+            
+            if len(items) < limit:
+                break
+            skip += limit
     
     def close(self):
         """Close the HTTP client."""
         self._client.close()
 
 
+class AsyncGuestyClient:
+    """Asyncio Guesty client that fetches collection pages concurrently."""
+    
+    def __init__(self, concurrency: Optional[int] = None):
+        self._token = _token
+        self._limiter = get_rate_limiter()
+        self._concurrency = max(1, concurrency or settings.guesty_page_concurrency)
+        self._client = httpx.AsyncClient(timeout=30.0)
+    
+    async def _get_token(self) -> str:
+        """Get or refresh OAuth access token."""
+        if self._token.is_valid():
+            return self._token.access_token
+        # The token lock is shared with other threads, so wait for it off the event loop
+        return await asyncio.to_thread(
+            self._token.get, lambda: httpx.post(**GuestyToken.request_kwargs(), timeout=30.0)
+        )
+    
+    async def _make_request(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[dict] = None,
+        json_data: Optional[dict] = None,
+        retries: Optional[int] = None,
+        stats: Optional[RequestStats] = None,
+    ) -> Any:
+        """
+        Make authenticated request to Guesty API with rate limiting and retry logic.
+        
+        Latency, size, retries and throttling of every attempt are added to
+        ``stats`` when given.
+        """
+        url = f"{settings.guesty_base_url}{endpoint}"
+        token = await self._get_token()
+        headers = {
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json",
+        }
+        retries = retries or settings.guesty_max_retries
+        
+        for attempt in range(retries):
+            waited = await self._limiter.acquire_async()
+            started = time.perf_counter()
+            try:
+                response = await self._client.request(
+                    method=method,
+                    url=url,
+                    headers=headers,
+                    params=params,
+                    json=json_data,
+                )
+                self._limiter.observe(response.headers)
+                if stats is not None:
+                    stats.record_wait(waited)
+                    stats.record_response(time.perf_counter() - started, len(response.content), attempt)
+                
+                if response.status_code == 401:
+                    # Token expired, refresh and retry; a parallel request may have already
+                    self._token.invalidate(token)
+                    token = await self._get_token()
+                    headers["Authorization"] = f"Bearer {token}"
+                    continue
+                
+                if response.status_code == 429:
+                    # Rate limited: hold back every request path, not just this one
+                    wait_time = rate_limit_delay(response, attempt)
+                    logger.warning(f"Rate limited, pausing requests for {wait_time:.1f}s")
+                    self._limiter.pause(wait_time)
+                    if stats is not None:
+                        stats.record_rate_limited()
+                    continue
+                
+                response.raise_for_status()
+                return response.json()
+            
+            except httpx.HTTPError as e:
+                logger.error(f"HTTP error on attempt {attempt + 1}: {e}")
+                if stats is not None:
+                    stats.record_error(attempt)
+                if attempt == retries - 1:
+                    raise
+                delay = backoff_delay(attempt)
+                if stats is not None:
+                    stats.record_wait(delay)
+                await asyncio.sleep(delay)
+        
+        raise Exception(f"Guesty request to {endpoint} still rate limited after {retries} attempts")
+    
+    async def _list(
+        self,
+        endpoint: str,
+        skip: int,
+        limit: int,
+        filters: Optional[list] = None,
+        stats: Optional[RequestStats] = None,
+    ) -> dict:
+        """Fetch one page of a paginated collection endpoint."""
+        return await self._make_request("GET", endpoint, params=_list_params(skip, limit, filters), stats=stats)
+    
+    async def get_listings(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[list] = None,
+        stats: Optional[RequestStats] = None,
+    ) -> dict:
+        """Fetch listings from Guesty."""
+        return await self._list("/listings", skip, limit, filters, stats)
+    
+    async def get_reservations(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[list] = None,
+        stats: Optional[RequestStats] = None,
+    ) -> dict:
+        """Fetch reservations from Guesty."""
+        return await self._list("/reservations", skip, limit, filters, stats)
+    
+    async def get_guests(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[list] = None,
+        stats: Optional[RequestStats] = None,
+    ) -> dict:
+        """Fetch guests from Guesty."""
+        return await self._list("/guests", skip, limit, filters, stats)
+    
+    async def get_conversations(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[list] = None,
+        stats: Optional[RequestStats] = None,
+    ) -> dict:
+        """Fetch conversations from Guesty."""
+        return await self._list("/communication/conversations", skip, limit, filters, stats)
+    
+    async def iter_pages(
+        self,
+        getter: str,
+        filters: Optional[list] = None,
+        limit: int = 100,
+        start_skip: int = 0,
+        stats: Optional[RequestStats] = None,
+    ) -> AsyncIterator[list[dict]]:
+        """
+        Yield the result pages of a collection, in order.
+        
+        The first page reports the collection's total ``count``; the remaining
+        pages are then requested with up to ``concurrency`` requests in flight.
+        Collections without a count are paged sequentially.
+        
+        Args:
+            getter: Name of the page getter, e.g. "get_reservations"
+            filters: Guesty filters applied to every page
+            limit: Page size
+            start_skip: Offset of the first page, e.g. a resume checkpoint
+            stats: Collects request statistics when given
+        """
+        fetch: Callable[..., Any] = getattr(self, getter)
+        
+        first = await fetch(skip=start_skip, limit=limit, filters=filters, stats=stats)
+        items = first.get("results", [])
+        if not items:
+            return
+        yield items
+        
+        total = first.get("count")
+        if total is None:
+            skip = start_skip + limit
+            while len(items) == limit:
+                items = (await fetch(skip=skip, limit=limit, filters=filters, stats=stats)).get("results", [])
+                if not items:
+                    break
+                yield items
+                skip += limit
+            return
+        
+        skips = iter(range(start_skip + limit, total, limit))
+        pending: deque[asyncio.Task] = deque()
+        
+        def schedule() -> None:
+            skip = next(skips, None)
+            if skip is not None:
+                pending.append(asyncio.create_task(fetch(skip=skip, limit=limit, filters=filters, stats=stats)))
+        
+        for _ in range(self._concurrency):
+            schedule()
+        
+        try:
+            while pending:
+                result = await pending.popleft()
+                schedule()
+                items = result.get("results", [])
+                if items:
+                    yield items
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    async def aclose(self):
+        """Close the HTTP client."""
+        await self._client.aclose()
+
+
+def iter_pages_concurrently(
+    getter: str,
+    filters: Optional[list] = None,
+    limit: int = 100,
+    concurrency: Optional[int] = None,
+    start_skip: int = 0,
+    stats: Optional[RequestStats] = None,
+) -> Iterator[list[dict]]:
+    """
+    Blocking iterator over pages fetched by an AsyncGuestyClient.
+    
+    The client runs on its own event loop thread, so in-flight page requests
+    keep progressing while the caller processes the page it was handed.
+    """
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, name="guesty-fetch", daemon=True)
+    thread.start()
+    
+    def run(coro):
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+    
+    async def start():
+        client = AsyncGuestyClient(concurrency)
+        return client, client.iter_pages(getter, filters, limit, start_skip, stats)
+    
+    client, pages = run(start())
+    try:
+        while True:
+            try:
+                yield run(pages.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        run(pages.aclose())
+        run(client.aclose())
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
 # Global client instance
 _client: Optional[GuestyClient] = None
 
@@ -0,0 +1,165 @@
+"""
+Client-side rate limiting for the Guesty Open API.
+
+Only httpx is needed at import time: listings-api uses this module too, so
+both services pace themselves with the same implementation.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import httpx
+
+# Guesty reports its budget per window as X-RateLimit-Remaining-<Window>
+WINDOW_HEADERS = {
+    "Second": 1.0,
+    "Minute": 60.0,
+    "Hour": 3600.0,
+}
+
+
+class _Bucket:
+    """Token bucket for a single rate-limit window."""
+    
+    def __init__(self, limit: float, window: float):
+        self.capacity = float(limit)
+        self.tokens = float(limit)
+        self.rate = limit / window
+
+
+class RateLimiter:
+    """
+    Token-bucket limiter shared by every Guesty request path.
+    
+    Each request takes one token from a bucket per window (second, minute,
+    hour), so requests are paced to the tightest budget. Tokens may go
+    negative: callers reserve a slot and sleep until it is due, which keeps
+    the order fair between threads and coroutines. The limiter is thread-safe
+    and never blocks while holding its lock, so the same instance serves the
+    sync client and the async client's event loop thread.
+    """
+    
+    def __init__(self, limits: dict[float, int], share: float = 1.0):
+        """
+        Args:
+            limits: Maximum requests keyed by window length in seconds
+            share: Fraction of each limit this process may use, when
+                several services spend the same Guesty budget
+        """
+        self._buckets = {
+            window: _Bucket(limit * share, window)
+            for window, limit in limits.items()
+            if limit > 0 and share > 0
+        }
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+    
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._updated = now
+        for bucket in self._buckets.values():
+            bucket.tokens = min(bucket.capacity, bucket.tokens + elapsed * bucket.rate)
+    
+    def reserve(self) -> float:
+        """Take a token from every bucket and return the seconds to wait before sending."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = max(0.0, self._paused_until - now)
+            for bucket in self._buckets.values():
+                bucket.tokens -= 1
+                if bucket.tokens < 0:
+                    wait = max(wait, -bucket.tokens / bucket.rate)
+            return wait
+    
+    def acquire(self) -> float:
+        """Block until a request may be sent; returns the seconds waited."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+    
+    async def acquire_async(self) -> float:
+        """Wait without blocking the event loop until a request may be sent; returns the seconds waited."""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+    
+    def pause(self, seconds: float):
+        """Hold back every request for ``seconds``, e.g. after a 429."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+    
+    def observe(self, headers: httpx.Headers):
+        """Align the local buckets with the budget Guesty reports as remaining."""
+        with self._lock:
+            self._refill(time.monotonic())
+            for name, window in WINDOW_HEADERS.items():
+                remaining = headers.get(f"X-RateLimit-Remaining-{name}")
+                bucket = self._buckets.get(window)
+                if remaining is None or bucket is None:
+                    continue
+                try:
+                    bucket.tokens = min(bucket.tokens, float(remaining))
+                except ValueError:
+                    continue
+
+
+def retry_after_seconds(headers: httpx.Headers) -> Optional[float]:
+    """Parse a Retry-After header given as seconds or an HTTP date."""
+    value = headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt: int, cap: float = 60.0) -> float:
+    """Exponential backoff with full jitter, so concurrent retries spread out."""
+    return random.uniform(0, min(cap, 2 ** (attempt + 1)))
+
+
+def rate_limit_delay(response: httpx.Response, attempt: int) -> float:
+    """Seconds to wait after a 429: Retry-After if present, else jittered backoff."""
+    delay = retry_after_seconds(response.headers)
+    if delay is None:
+        delay = backoff_delay(attempt)
+    return delay
+
+
+# Global limiter instance
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get or create the process-wide Guesty rate limiter."""
+    # Import here so that listings-api can use this module without the backend's settings
+    from app.config import get_settings
+    
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            settings = get_settings()
+            _limiter = RateLimiter({
+                1.0: settings.guesty_rate_limit_per_second,
+                60.0: settings.guesty_rate_limit_per_minute,
+                3600.0: settings.guesty_rate_limit_per_hour,
+            }, share=settings.guesty_rate_limit_share)
+    return _limiter
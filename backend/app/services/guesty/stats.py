@@ -0,0 +1,57 @@
+"""Request statistics collected while paging the Guesty API."""
+
+import threading
+from typing import Optional
+
+
+class RequestStats:
+    """
+    Thread-safe tally of Guesty requests made for one sync stage.
+    
+    Shared between the fetch thread and the async client's event loop, so
+    every update takes the lock.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.errors = 0
+        self.bytes_received = 0
+        self.throttle_seconds = 0.0  # Waiting on the rate limiter, 429 pauses and backoff
+        self._latencies: list[float] = []
+    
+    def record_response(self, latency: float, size: int, attempt: int):
+        """Count one HTTP response; ``attempt`` > 0 marks a retry."""
+        with self._lock:
+            self.requests += 1
+            self.bytes_received += size
+            self._latencies.append(latency)
+            if attempt > 0:
+                self.retries += 1
+    
+    def record_error(self, attempt: int):
+        """Count a request that failed without a response."""
+        with self._lock:
+            self.requests += 1
+            self.errors += 1
+            if attempt > 0:
+                self.retries += 1
+    
+    def record_rate_limited(self):
+        with self._lock:
+            self.rate_limited += 1
+    
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self.throttle_seconds += seconds
+    
+    def latency_percentile(self, q: float) -> Optional[float]:
+        """Response latency in seconds at quantile ``q`` (0-1), or None without requests."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if not latencies:
+            return None
+        index = min(len(latencies) - 1, max(0, round(q * (len(latencies) - 1))))
+        return latencies[index]
@@ -1,5 +1,19 @@
 """Sync service exports."""
 
-from app.services.sync.sync_service import run_full_sync
+from app.services.sync.backfill import run_reservation_backfill
+from app.services.sync.sync_service import (
+    run_full_sync,
+    run_incremental_sync,
+    run_replay,
+    run_sync,
+    resume_sync,
+)
 
-__all__ = ["run_full_sync"]
+__all__ = [
+    "run_full_sync",
+    "run_incremental_sync",
+    "run_reservation_backfill",
+    "run_replay",
+    "run_sync",
+    "resume_sync",
+]
@@ -0,0 +1,262 @@
+"""Date-window sharded backfill of reservations."""
+
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime
+from typing import Optional
+
+from app.config import get_settings
+from app.database.connection import SessionLocal
+from app.database.models import Reservation, SyncLog, SyncWindow
+from app.jobs.lease import SYNC_LEASE, advisory_lease
+from app.services.analytics_cache import data_generation
+from app.services.guesty.client import get_guesty_client
+from app.services.sync.landing import land_pages, landing_enabled
+from app.services.sync.metrics import StageMetrics
+from app.services.sync.rollup import refresh_daily_facts
+from app.services.sync.sync_service import (
+    check_in_filters,
+    fail_interrupted_runs,
+    fetch_pages,
+    open_checkpoint,
+    reservation_lookback_date,
+    reservation_row,
+    save_watermark,
+    sync_pages,
+)
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def _add_months(value: date, months: int) -> date:
+    """First day of the month ``months`` after ``value``'s month."""
+    month_index = value.year * 12 + value.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def check_in_windows(start: date, months: int) -> list[tuple[date, Optional[date]]]:
+    """
+    Split check-ins from ``start`` onwards into consecutive month windows.
+    
+    The last window starts in the current month and is open-ended, so future
+    check-ins are covered just like the unsharded sync.
+    """
+    today = datetime.utcnow().date()
+    windows = []
+    window_start = start
+    while True:
+        window_end = _add_months(window_start, max(1, months))
+        if window_end > today:
+            windows.append((window_start, None))
+            return windows
+        windows.append((window_start, window_end))
+        window_start = window_end
+
+
+def _sync_window(window_id: int) -> int:
+    """Sync one reservation window on its own session; runs in a worker thread."""
+    db = SessionLocal()
+    try:
+        window = db.get(SyncWindow, window_id)
+        window.status = "running"
+        window.started_at = datetime.utcnow()
+        window.completed_at = None
+        window.error_message = None
+        db.commit()
+        
+        # A retried window continues after its last committed page
+        checkpoint = open_checkpoint(
+            db, window.sync_log_id, window.entity_type,
+            check_in_filters(window.window_start, window.window_end),
+            sync_window_id=window.id,
+        )
+        
+        metrics = StageMetrics()
+        pages = fetch_pages(
+            get_guesty_client(),
+            "get_reservations",
+            json.loads(checkpoint.filters),
+            checkpoint.next_skip or 0,
+            metrics.requests,
+        )
+        if landing_enabled():
+            pages = land_pages(
+                pages, window.sync_log_id, window.entity_type,
+                checkpoint.next_skip or 0, part=f"window-{window.id}",
+            )
+        
+        try:
+            count, high_water = sync_pages(
+                db, Reservation,
+                pages,
+                reservation_row,
+                window,
+                checkpoint,
+                metrics,
+            )
+        except Exception as e:
+            db.rollback()
+            window = db.get(SyncWindow, window_id)
+            window.status = "failed"
+            window.error_message = str(e)
+            window.completed_at = datetime.utcnow()
+            db.commit()
+            metrics.save(db, window.sync_log_id, window.entity_type, "failed", window.id)
+            raise
+        
+        checkpoint.completed = True
+        window.status = "success"
+        window.last_updated_at = high_water
+        window.completed_at = datetime.utcnow()
+        db.commit()
+        metrics.save(db, window.sync_log_id, window.entity_type, "success", window.id)
+        return count
+    finally:
+        db.close()
+
+
+def run_reservation_backfill(retry_sync_id: Optional[int] = None) -> bool:
+    """
+    Run a reservations backfill while holding the cluster-wide sync lease.
+    
+    Returns without doing anything, and False, if another process is syncing.
+    See ``_run_reservation_backfill`` for the arguments.
+    """
+    with advisory_lease(SYNC_LEASE) as acquired:
+        if not acquired:
+            logger.info("Another process holds the sync lease; skipping backfill")
+            return False
+        
+        db = SessionLocal()
+        try:
+            fail_interrupted_runs(db)
+        finally:
+            db.close()
+        
+        _run_reservation_backfill(retry_sync_id)
+        return True
+
+
+def _run_reservation_backfill(retry_sync_id: Optional[int] = None):
+    """
+    Backfill reservations as independent check-in windows processed in parallel.
+    
+    The lookback period is split into windows of ``sync_backfill_window_months``
+    months, each paged separately by one of ``sync_backfill_workers`` workers.
+    Every window's progress is stored in ``sync_windows``; listings and guests
+    should already be synced so foreign keys resolve.
+    
+    Args:
+        retry_sync_id: Re-run only the unfinished windows of this earlier
+            backfill, each from its last committed page, instead of
+            starting a new one.
+    """
+    logger.info("Starting reservations backfill")
+    db = SessionLocal()
+    
+    try:
+        if retry_sync_id is not None:
+            sync_log = db.get(SyncLog, retry_sync_id)
+            if sync_log is None or sync_log.entity_type != "reservations_backfill":
+                raise ValueError(f"No reservations backfill with id {retry_sync_id}")
+            sync_log.status = "running"
+            sync_log.error_message = None
+            sync_log.completed_at = None
+        else:
+            sync_log = SyncLog(
+                entity_type="reservations_backfill",
+                started_at=datetime.utcnow(),
+                status="running",
+                records_synced=0,
+                records_inserted=0,
+                records_updated=0,
+                records_unchanged=0,
+            )
+            db.add(sync_log)
+            db.flush()
+            for window_start, window_end in check_in_windows(
+                reservation_lookback_date(), settings.sync_backfill_window_months
+            ):
+                db.add(SyncWindow(
+                    sync_log_id=sync_log.id,
+                    entity_type="reservations",
+                    window_start=window_start,
+                    window_end=window_end,
+                ))
+        db.commit()
+        
+        pending_ids = [
+            w.id for w in db.query(SyncWindow.id).filter(
+                SyncWindow.sync_log_id == sync_log.id,
+                SyncWindow.status != "success",
+            ).order_by(SyncWindow.window_start)
+        ]
+        logger.info(f"Backfilling {len(pending_ids)} reservation windows")
+        
+        # One token for every window, fetched before the workers start
+        if pending_ids:
+            get_guesty_client().authenticate()
+        
+        failed = 0
+        with ThreadPoolExecutor(max_workers=max(1, settings.sync_backfill_workers)) as pool:
+            futures = [
+                pool.submit(_sync_window, window_id)
+                for window_id in pending_ids
+            ]
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    failed += 1
+                    logger.error(f"Backfill window failed: {e}")
+        
+        # Totals cover every window of the backfill, including earlier attempts
+        db.expire_all()
+        windows = db.query(SyncWindow).filter(SyncWindow.sync_log_id == sync_log.id).all()
+        sync_log.records_synced = sum(w.records_synced or 0 for w in windows)
+        sync_log.records_inserted = sum(w.records_inserted or 0 for w in windows)
+        sync_log.records_updated = sum(w.records_updated or 0 for w in windows)
+        sync_log.records_unchanged = sum(w.records_unchanged or 0 for w in windows)
+        sync_log.completed_at = datetime.utcnow()
+        db.commit()
+        
+        # Windows that did complete are already stored, so roll them up either
+        # way and let cached analytics see them
+        refresh_daily_facts(db)
+        data_generation.advance(db)
+        
+        if failed:
+            sync_log.status = "failed"
+            sync_log.error_message = f"{failed} of {len(windows)} windows failed; retry with retry_sync_id={sync_log.id}"
+            db.commit()
+            logger.error(sync_log.error_message)
+            return
+        
+        sync_log.status = "success"
+        db.commit()
+        
+        # Only a complete backfill may move the incremental watermark
+        high_waters = [w.last_updated_at for w in windows if w.last_updated_at]
+        save_watermark(db, "reservations", max(high_waters) if high_waters else None)
+        
+        logger.info(f"Reservations backfill completed. Total records: {sync_log.records_synced}")
+    
+    except Exception as e:
+        logger.error(f"Backfill failed: {e}")
+        db.rollback()
+        
+        sync_log = db.query(SyncLog).filter(
+            SyncLog.status == "running",
+            SyncLog.entity_type == "reservations_backfill",
+        ).first()
+        if sync_log:
+            sync_log.status = "failed"
+            sync_log.error_message = str(e)
+            sync_log.completed_at = datetime.utcnow()
+            db.commit()
+        
+        raise
+    finally:
+        db.close()
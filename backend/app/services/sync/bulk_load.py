@@ -0,0 +1,93 @@
+"""COPY-based bulk loading of sync rows into a session-local staging table."""
+
+from datetime import date, datetime
+from typing import Iterator, Optional
+
+from sqlalchemy import Column, MetaData, Table, text
+from sqlalchemy.orm import Session
+
+
+def _copy_value(value) -> str:
+    """Encode one value for COPY's text format."""
+    if value is None:
+        return r"\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+class _CopyStream:
+    """File-like reader that encodes rows lazily as COPY reads them."""
+    
+    def __init__(self, lines: Iterator[str]):
+        self._lines = lines
+        self._buffer = ""
+    
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._buffer) < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            self._buffer += line
+        if size < 0:
+            size = len(self._buffer)
+        chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+    
+    def readline(self, size: Optional[int] = None) -> str:
+        return self.read(size if size is not None else -1)
+
+
+def copy_to_staging(db: Session, name: str, columns: list[Column], values: list[dict]) -> Table:
+    """
+    Stream ``values`` into a temporary staging table with ``COPY ... FROM STDIN``.
+    
+    The table is session-local and unlogged (temporary tables skip the WAL),
+    and is dropped when the transaction commits, so concurrent syncs never
+    see each other's rows. A caller loading more than one batch per
+    transaction drops it once merged.
+    
+    Args:
+        db: Database session; the load joins its open transaction
+        name: Staging table name
+        columns: Staging columns, named like the keys of ``values``
+        values: Rows to load
+    
+    Returns:
+        The staging table, for selecting from in the same transaction
+    """
+    staging = Table(
+        name,
+        MetaData(),
+        *columns,
+        prefixes=["TEMPORARY"],
+        postgresql_on_commit="DROP",
+    )
+    connection = db.connection()
+    staging.create(connection)
+    
+    keys = [c.name for c in staging.columns]
+    lines = (
+        "\t".join(_copy_value(value.get(key)) for key in keys) + "\n"
+        for value in values
+    )
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {name} ({', '.join(keys)}) FROM STDIN",
+            _CopyStream(lines),
+        )
+    finally:
+        cursor.close()
+    
+    # Give the planner real row counts for the merge join
+    db.execute(text(f"ANALYZE {name}"))
+    return staging
@@ -0,0 +1,85 @@
+"""Landing store of raw Guesty API pages, for offline replay."""
+
+import gzip
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def landing_enabled() -> bool:
+    """Check if fetched pages should be written to the landing directory."""
+    return bool(settings.sync_landing_dir)
+
+
+def _entity_dir(sync_log_id: int, entity_type: str, part: Optional[str] = None) -> Path:
+    """Directory holding one run's pages of an entity, e.g. ``<root>/42/reservations``."""
+    path = Path(settings.sync_landing_dir) / str(sync_log_id) / entity_type
+    return path / part if part else path
+
+
+def land_pages(
+    pages: Iterable[list[dict]],
+    sync_log_id: int,
+    entity_type: str,
+    start_skip: int = 0,
+    part: Optional[str] = None,
+) -> Iterator[list[dict]]:
+    """
+    Pass pages through unchanged, writing each one as gzipped JSONL.
+    
+    Files are named by the page's skip offset and written atomically, so a
+    run that dies mid-page never leaves a truncated page behind.
+    
+    Args:
+        pages: Raw Guesty result pages
+        sync_log_id: Run the pages belong to
+        entity_type: listings, guests, reservations or conversations
+        start_skip: Offset of the first page
+        part: Optional sub-key, e.g. a backfill window
+    """
+    directory = _entity_dir(sync_log_id, entity_type, part)
+    directory.mkdir(parents=True, exist_ok=True)
+    skip = start_skip
+    
+    try:
+        for items in pages:
+            path = directory / f"{skip:09d}.jsonl.gz"
+            tmp_path = path.with_suffix(".tmp")
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                for item in items:
+                    f.write(json.dumps(item, separators=(",", ":")))
+                    f.write("\n")
+            os.replace(tmp_path, path)
+            
+            yield items
+            skip += len(items)
+    finally:
+        # Stop the underlying fetcher as soon as the consumer stops
+        close = getattr(pages, "close", None)
+        if close is not None:
+            close()
+
+
+def replay_pages(sync_log_id: int, entity_type: str) -> Iterator[list[dict]]:
+    """
+    Yield an entity's landed pages for a run, in skip order, without any network.
+    
+    Pages of every part (e.g. all backfill windows) are included.
+    """
+    directory = _entity_dir(sync_log_id, entity_type)
+    if not directory.is_dir():
+        logger.warning(f"No landed {entity_type} pages for sync {sync_log_id}")
+        return
+    
+    for path in sorted(directory.rglob("*.jsonl.gz")):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            items = [json.loads(line) for line in f if line.strip()]
+        if items:
+            yield items
@@ -0,0 +1,84 @@
+"""Per-stage throughput metrics of sync runs."""
+
+import logging
+import time
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.database.models import SyncStageMetric
+from app.services.guesty.stats import RequestStats
+
+logger = logging.getLogger(__name__)
+
+
+class StageMetrics:
+    """
+    Timings and counts of the fetch, transform and write stages of one entity sync.
+    
+    The fetch stage is measured per request by the Guesty client through
+    ``requests``; the pipeline and ``sync_pages`` add transform and write times.
+    """
+    
+    def __init__(self):
+        self.requests = RequestStats()
+        self.pages_fetched = 0
+        self.rows_transformed = 0
+        self.transform_seconds = 0.0
+        self.rows_written = 0
+        self.write_seconds = 0.0
+        self.commits = 0
+        self.commit_seconds = 0.0
+        self._started = time.perf_counter()
+    
+    def add_transform(self, rows: int, seconds: float):
+        self.pages_fetched += 1
+        self.rows_transformed += rows
+        self.transform_seconds += seconds
+    
+    def add_write(self, rows: int, write_seconds: float, commit_seconds: float):
+        self.rows_written += rows
+        self.write_seconds += write_seconds
+        self.commits += 1
+        self.commit_seconds += commit_seconds
+    
+    def save(
+        self,
+        db: Session,
+        sync_log_id: int,
+        entity_type: str,
+        status: str,
+        sync_window_id: Optional[int] = None,
+    ):
+        """Store the metrics as a ``sync_stage_metrics`` row; never fails the sync."""
+        p50 = self.requests.latency_percentile(0.5)
+        p95 = self.requests.latency_percentile(0.95)
+        try:
+            db.add(SyncStageMetric(
+                sync_log_id=sync_log_id,
+                sync_window_id=sync_window_id,
+                entity_type=entity_type,
+                status=status,
+                pages_fetched=self.pages_fetched,
+                requests=self.requests.requests,
+                retries=self.requests.retries,
+                rate_limited=self.requests.rate_limited,
+                bytes_received=self.requests.bytes_received,
+                api_latency_p50_ms=p50 * 1000 if p50 is not None else None,
+                api_latency_p95_ms=p95 * 1000 if p95 is not None else None,
+                throttle_seconds=self.requests.throttle_seconds,
+                rows_transformed=self.rows_transformed,
+                transform_seconds=self.transform_seconds,
+                transform_rows_per_second=(
+                    self.rows_transformed / self.transform_seconds if self.transform_seconds else None
+                ),
+                rows_written=self.rows_written,
+                write_seconds=self.write_seconds,
+                commits=self.commits,
+                commit_seconds=self.commit_seconds,
+                elapsed_seconds=time.perf_counter() - self._started,
+            ))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to save {entity_type} stage metrics: {e}")
@@ -0,0 +1,110 @@
+"""Streaming fetch -> transform -> write pipeline for sync pages."""
+
+import queue
+import threading
+import time
+from typing import Callable, Iterable, Iterator
+
+# Marks the end of a stage's output
+_DONE = object()
+
+
+class _StageError:
+    """Carries an exception raised in a stage thread to the consumer."""
+    
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def pipeline_pages(
+    pages: Iterable[list[dict]],
+    to_row: Callable[[dict], dict],
+    depth: int = 4,
+    metrics=None,
+) -> Iterator[tuple[list[dict], list[dict]]]:
+    """
+    Fetch and transform pages on background threads, yielding them to the writer.
+    
+    Page fetching and row transformation each run on their own thread,
+    connected to the consumer by queues holding at most ``depth`` pages, so
+    API I/O, transformation and database writes overlap while memory stays
+    bounded regardless of collection size. The consumer (which owns the
+    database session) does the writing in the calling thread.
+    
+    Args:
+        pages: Iterable of raw Guesty result pages
+        to_row: Transforms one Guesty item into column values
+        depth: Maximum pages buffered between consecutive stages
+        metrics: StageMetrics receiving each page's transform time
+    
+    Yields:
+        Tuples of (raw items, transformed rows) per page, in fetch order
+    """
+    fetched: queue.Queue = queue.Queue(maxsize=depth)
+    transformed: queue.Queue = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    
+    def put(target: queue.Queue, value) -> bool:
+        # Give up once the consumer has stopped reading
+        while not stop.is_set():
+            try:
+                target.put(value, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def fetch_stage():
+        try:
+            for items in pages:
+                if not put(fetched, items):
+                    break
+        except BaseException as e:
+            put(fetched, _StageError(e))
+        finally:
+            close = getattr(pages, "close", None)
+            if close is not None:
+                close()
+            put(fetched, _DONE)
+    
+    def transform_stage():
+        while True:
+            try:
+                value = fetched.get(timeout=0.1)
+            except queue.Empty:
+                if stop.is_set():
+                    return
+                continue
+            if value is _DONE or isinstance(value, _StageError):
+                put(transformed, value)
+                return
+            try:
+                started = time.perf_counter()
+                rows = [to_row(item) for item in value]
+                if metrics is not None:
+                    metrics.add_transform(len(rows), time.perf_counter() - started)
+            except BaseException as e:
+                put(transformed, _StageError(e))
+                return
+            if not put(transformed, (value, rows)):
+                return
+    
+    threads = [
+        threading.Thread(target=fetch_stage, name="sync-fetch", daemon=True),
+        threading.Thread(target=transform_stage, name="sync-transform", daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+    
+    try:
+        while True:
+            value = transformed.get()
+            if value is _DONE:
+                break
+            if isinstance(value, _StageError):
+                raise value.error
+            yield value
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
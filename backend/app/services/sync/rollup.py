@@ -0,0 +1,122 @@
+"""Daily reservation fact rollup read by the analytics endpoints."""
+
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import Date, case, cast, delete, func, insert, select, union, update
+from sqlalchemy.orm import Session
+
+from app.database.models import Reservation, ReservationDailyFact, SyncState
+
+logger = logging.getLogger(__name__)
+
+# SyncState row holding the rollup's reservations.updated_at high-water mark
+FACTS_STATE = "reservation_daily_facts"
+
+# Re-read rows written this long before the mark, so rows committed late by a
+# concurrent writer (e.g. the webhook buffer) are not missed
+REFRESH_OVERLAP = timedelta(minutes=5)
+
+# ReservationDailyFact columns filled by _daily_facts_select, in order
+FACT_COLUMNS = [
+    "listing_id", "source", "status", "check_in", "booked_on",
+    "bookings", "revenue_cents", "nights", "nights_count",
+    "lead_time_days", "lead_time_count", "cancel_notice_days", "cancel_notice_count",
+]
+
+
+def _daily_facts_select():
+    """Reservations aggregated to ReservationDailyFact rows."""
+    booked_on = cast(Reservation.booked_at, Date)
+    # Days between cancellation and check-in; NULL unless cancelled
+    cancel_notice = case(
+        (
+            (Reservation.status == "cancelled") & Reservation.cancelled_at.isnot(None),
+            Reservation.check_in - cast(Reservation.cancelled_at, Date),
+        ),
+    )
+    return select(
+        Reservation.listing_id,
+        Reservation.source,
+        Reservation.status,
+        Reservation.check_in,
+        booked_on,
+        func.count(),
+        func.coalesce(func.sum(Reservation.total_price), 0),
+        func.coalesce(func.sum(Reservation.nights), 0),
+        func.count(Reservation.nights),
+        func.coalesce(func.sum(Reservation.lead_time_days), 0),
+        func.count(Reservation.lead_time_days),
+        func.coalesce(func.sum(cancel_notice), 0),
+        func.count(cancel_notice),
+    ).group_by(
+        Reservation.listing_id,
+        Reservation.source,
+        Reservation.status,
+        Reservation.check_in,
+        booked_on,
+    )
+
+
+def refresh_daily_facts(db: Session, full: bool = False) -> int:
+    """
+    Bring ``reservation_daily_facts`` up to date with ``reservations``.
+    
+    Only check-in days with reservations written since the last refresh are
+    rebuilt, including the day a re-dated reservation moved away from
+    (kept in ``reservations.rolled_up_check_in``). The first refresh, or
+    ``full``, rebuilds every day. The facts change in one transaction, so
+    readers never see a half-refreshed day. Errors are logged rather than
+    raised: the mark is not advanced, and the next refresh retries.
+    
+    Returns:
+        Number of check-in days rebuilt
+    """
+    try:
+        state = db.get(SyncState, FACTS_STATE)
+        since = None
+        if state is not None and state.last_updated_at is not None and not full:
+            since = state.last_updated_at - REFRESH_OVERLAP
+        
+        changed = [] if since is None else [Reservation.updated_at >= since]
+        high_water = db.execute(select(func.max(Reservation.updated_at)).where(*changed)).scalar()
+        
+        if since is None:
+            days = None
+            db.execute(delete(ReservationDailyFact))
+            db.execute(insert(ReservationDailyFact).from_select(FACT_COLUMNS, _daily_facts_select()))
+        else:
+            days = list(db.execute(union(
+                select(Reservation.check_in).where(*changed),
+                select(Reservation.rolled_up_check_in).where(*changed, Reservation.rolled_up_check_in.isnot(None)),
+            )).scalars())
+            if days:
+                db.execute(delete(ReservationDailyFact).where(ReservationDailyFact.check_in.in_(days)))
+                db.execute(insert(ReservationDailyFact).from_select(
+                    FACT_COLUMNS, _daily_facts_select().where(Reservation.check_in.in_(days))
+                ))
+        
+        # Remember each row's rolled-up day; updated_at is kept so this is not a change
+        db.execute(
+            update(Reservation)
+            .where(*changed, Reservation.rolled_up_check_in.is_distinct_from(Reservation.check_in))
+            .values(rolled_up_check_in=Reservation.check_in, updated_at=Reservation.updated_at)
+        )
+        
+        if state is None:
+            state = SyncState(entity_type=FACTS_STATE)
+            db.add(state)
+        if high_water and (not state.last_updated_at or high_water > state.last_updated_at):
+            state.last_updated_at = high_water
+        state.last_synced_at = datetime.utcnow()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Failed to refresh reservation daily facts: {e}")
+        return 0
+    
+    if days is None:
+        logger.info("Rebuilt reservation daily facts")
+        return db.query(func.count(func.distinct(ReservationDailyFact.check_in))).scalar() or 0
+    logger.info(f"Refreshed reservation daily facts for {len(days)} check-in days")
+    return len(days)
@@ -1,22 +1,62 @@
 """Data synchronization service for pulling data from Guesty."""
 
+import json
 import logging
 import hashlib
+import time
 import uuid
-from datetime import datetime, timedelta
-from typing import Optional
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Iterable, Iterator, Optional, Sequence
 
+from sqlalchemy import Column, String, cast, desc, literal_column, or_, select, union, update, values as sa_values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
 from app.database.connection import SessionLocal
-from app.database.models import Listing, Guest, Reservation, Conversation, SyncLog
-from app.services.guesty.client import get_guesty_client
+from app.jobs.lease import SYNC_LEASE, advisory_lease
+from app.services.analytics_cache import data_generation
+from app.database.models import Listing, Guest, Reservation, Conversation, SyncLog, SyncState, SyncCheckpoint
+from app.services.guesty.client import get_guesty_client, iter_pages_concurrently
 from app.services.guesty.normalizer import normalize_source
+from app.services.guesty.stats import RequestStats
+from app.services.sync.bulk_load import copy_to_staging
+from app.services.sync.landing import land_pages, landing_enabled, replay_pages
+from app.services.sync.metrics import StageMetrics
+from app.services.sync.pipeline import pipeline_pages
+from app.services.sync.rollup import refresh_daily_facts
 from app.config import get_settings
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Columns set once on insert and never overwritten by an upsert
+_INSERT_ONLY_COLUMNS = {"id", "guesty_id", "created_at"}
+
+# Foreign keys resolved in SQL while upserting:
+# model -> {fk column: (referenced model, row key holding the Guesty id)}
+FOREIGN_KEYS = {
+    Reservation: {
+        "listing_id": (Listing, "listing_guesty_id"),
+        "guest_id": (Guest, "guest_guesty_id"),
+    },
+    Conversation: {
+        "listing_id": (Listing, "listing_guesty_id"),
+        "guest_id": (Guest, "guest_guesty_id"),
+        "reservation_id": (Reservation, "reservation_guesty_id"),
+    },
+}
+
+# Guests requested per lazy guest lookup (one page)
+GUEST_BATCH_SIZE = 100
+
+# Large collections written through COPY batches (see ``sync_copy_threshold``)
+BULK_LOAD_MODELS = (Reservation, Conversation)
+
+# Boolean columns set from whether a foreign key resolved: model -> {column: fk column}
+FOREIGN_KEY_FLAGS = {
+    Conversation: {"converted_to_booking": "reservation_id"},
+}
+
 
 def hash_email(email: Optional[str]) -> Optional[str]:
     """Hash email for privacy (only store hash)."""
@@ -25,331 +65,856 @@ def hash_email(email: Optional[str]) -> Optional[str]:
     return hashlib.sha256(email.lower().encode()).hexdigest()
 
 
-def sync_listings(db: Session, client) -> int:
+def parse_iso(value: str) -> datetime:
+    """Parse a Guesty ISO-8601 timestamp."""
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def row_hash(row: dict) -> str:
+    """Hash a row's normalized column values to detect unchanged records."""
+    payload = json.dumps(row, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _staging_columns(table, keys: list[str]) -> list:
+    """Typed staging columns for a batch's keys; ``*_guesty_id`` keys are strings."""
+    return [Column(key, table.c[key].type if key in table.c else String()) for key in keys]
+
+
+def _staged_select(model, staged, keys: list[str]):
+    """
+    Select staged rows joined to the rows their Guesty foreign keys refer to.
+
+    Each ``*_guesty_id`` key is resolved with a LEFT JOIN on the referenced
+    table's unique guesty_id index, so no id maps have to be loaded into
+    memory.
+
+    Args:
+        model: ORM model the rows are written to
+        staged: VALUES list or staging table with a column per key
+        keys: Row keys, including the ``*_guesty_id`` source keys
+
+    Returns:
+        Tuple of (target column names, SELECT producing them)
+    """
+    table = model.__table__
+    foreign_keys = FOREIGN_KEYS.get(model, {})
+    source_keys = {source_key for _, source_key in foreign_keys.values()}
+
+    # Source keys are only written when the table keeps them, e.g. guest_guesty_id
+    columns = [key for key in keys if key not in source_keys or key in table.c]
+    selected = [cast(staged.c[key], table.c[key].type) for key in columns]
+    source = staged
+    refs = {}
+    for fk_column, (ref_model, source_key) in foreign_keys.items():
+        ref = ref_model.__table__.alias(f"ref_{fk_column}")
+        source = source.outerjoin(ref, ref.c.guesty_id == staged.c[source_key])
+        refs[fk_column] = ref
+        columns.append(fk_column)
+        selected.append(ref.c.id)
+    for flag_column, fk_column in FOREIGN_KEY_FLAGS.get(model, {}).items():
+        columns.append(flag_column)
+        selected.append(refs[fk_column].c.id.isnot(None))
+
+    return columns, select(*selected).select_from(source)
+
+
+def upsert_rows(db: Session, model, rows: list[dict]) -> tuple[int, int, int]:
+    """
+    Write a batch of rows with a single INSERT ... ON CONFLICT (guesty_id) DO UPDATE.
+
+    Existing rows whose ``row_hash`` and resolved foreign keys already match
+    are left alone, so a no-op sync writes no new row versions and leaves
+    ``updated_at`` as is. Foreign keys listed in FOREIGN_KEYS are resolved
+    in the same statement. Batches of at least ``sync_copy_threshold`` rows
+    are loaded with COPY into a staging table and merged from there instead
+    of being bound as statement parameters.
+
+    Args:
+        db: Database session
+        model: ORM model whose table is written
+        rows: Column values keyed by column name, each including guesty_id
+
+    Returns:
+        Tuple of (inserted, updated, unchanged) row counts
+    """
+    if not rows:
+        return 0, 0, 0
+
+    # Postgres rejects a batch that updates the same key twice; last item wins
+    deduped = {row["guesty_id"]: row for row in rows}
+    now = datetime.utcnow()
+    values = [
+        {"id": str(uuid.uuid4()), "created_at": now, "updated_at": now, **row, "row_hash": row_hash(row)}
+        for row in deduped.values()
+    ]
+
+    table = model.__table__
+    keys = list(values[0])
+    use_copy = 0 < settings.sync_copy_threshold <= len(values)
+    if use_copy:
+        staged = copy_to_staging(db, f"staging_{table.name}", _staging_columns(table, keys), values)
+        columns, staged_select = _staged_select(model, staged, keys)
+        stmt = pg_insert(table).from_select(columns, staged_select)
+    elif model in FOREIGN_KEYS:
+        staged = sa_values(*_staging_columns(table, keys), name="staged").data(
+            [tuple(value[key] for key in keys) for value in values]
+        )
+        columns, staged_select = _staged_select(model, staged, keys)
+        stmt = pg_insert(table).from_select(columns, staged_select)
+    else:
+        columns = keys
+        stmt = pg_insert(table).values(values)
+
+    # A referenced row may appear after its referrer was stored unresolved
+    changed = table.c.row_hash.is_distinct_from(stmt.excluded.row_hash)
+    for fk_column in FOREIGN_KEYS.get(model, {}):
+        changed = or_(changed, table.c[fk_column].is_distinct_from(stmt.excluded[fk_column]))
+
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.guesty_id],
+        set_={
+            key: stmt.excluded[key]
+            for key in columns
+            if key not in _INSERT_ONLY_COLUMNS
+        },
+        where=changed,
+    ).returning(literal_column("(xmax = 0)").label("inserted"))
+
+    # Skipped (unchanged) conflicts return no row
+    flags = db.execute(stmt).scalars().all()
+    if use_copy:
+        # ON COMMIT DROP alone would clash with the next batch of the same transaction
+        staged.drop(db.connection())
+    inserted = sum(1 for flag in flags if flag)
+    return inserted, len(flags) - inserted, len(values) - len(flags)
+
+
+def record_page(db: Session, progress, inserted: int, updated: int, unchanged: int = 0):
+    """Add a page's counts to a SyncLog or SyncWindow and commit them with the page."""
+    if progress is not None:
+        progress.records_synced = (progress.records_synced or 0) + inserted + updated + unchanged
+        progress.records_inserted = (progress.records_inserted or 0) + inserted
+        progress.records_updated = (progress.records_updated or 0) + updated
+        progress.records_unchanged = (progress.records_unchanged or 0) + unchanged
+    db.commit()
+
+
+def listing_row(item: dict) -> dict:
+    """Transform a Guesty listing into listings column values."""
+    return {
+        "guesty_id": item["_id"],
+        "name": item.get("title", ""),
+        "bedrooms": item.get("bedrooms", 0),
+        "bathrooms": item.get("bathrooms", 0),
+        "property_type": item.get("propertyType", ""),
+        "active": item.get("active", True),
+        "address": item.get("address", {}).get("full", ""),
+    }
+
+
+def guest_row(item: dict) -> dict:
+    """Transform a Guesty guest into guests column values."""
+    return {
+        "guesty_id": item["_id"],
+        "email_hash": hash_email(item.get("email")),
+    }
+
+
+def reservation_row(item: dict) -> dict:
+    """Transform a Guesty reservation into reservations column values."""
+    # Parse dates
+    check_in = parse_iso(item["checkIn"]).date()
+    check_out = parse_iso(item["checkOut"]).date()
+    created_at_raw = (
+        item.get("createdAt")
+        or item.get("bookedAt")
+        or item.get("confirmedAt")
+        or item.get("created_at")
+    )
+    if created_at_raw:
+        booked_at = parse_iso(created_at_raw)
+    else:
+        # Fallback to check-in date to avoid hard failure
+        booked_at = datetime.combine(check_in, datetime.min.time())
+
+    # Get price in cents
+    money = item.get("money", {})
+    total_price = int(float(money.get("totalPrice", 0)) * 100)
+
+    # Map status
+    status = item.get("status", "confirmed")
+
+    # Handle cancelled_at
+    cancelled_at = None
+    if status == "cancelled" and item.get("canceledAt"):
+        cancelled_at = parse_iso(item["canceledAt"])
+
+    return {
+        "guesty_id": item["_id"],
+        "listing_guesty_id": item.get("listingId"),
+        "guest_guesty_id": item.get("guestId"),
+        "source": normalize_source(item.get("source", "unknown")),
+        "status": status,
+        "check_in": check_in,
+        "check_out": check_out,
+        "booked_at": booked_at,
+        "total_price": total_price,
+        "nights": (check_out - check_in).days,
+        "lead_time_days": (check_in - booked_at.date()).days,
+        "cancelled_at": cancelled_at,
+    }
+
+
+def conversation_row(item: dict) -> dict:
+    """Transform a Guesty conversation into conversations column values."""
+    # Parse first message time
+    first_message_at = None
+    if item.get("createdAt"):
+        first_message_at = parse_iso(item["createdAt"])
+
+    return {
+        "guesty_id": item["_id"],
+        "listing_guesty_id": item.get("listingId"),
+        "guest_guesty_id": item.get("guestId"),
+        "reservation_guesty_id": item.get("reservationId"),
+        "source": normalize_source(item.get("source", "unknown")),
+        "first_message_at": first_message_at,
+        "message_count": item.get("messageCount", 0),
+    }
+
+
+def get_watermark(db: Session, entity_type: str) -> Optional[datetime]:
+    """Get the stored updatedAt high-water mark for an entity."""
+    state = db.get(SyncState, entity_type)
+    return state.last_updated_at if state else None
+
+
+def save_watermark(db: Session, entity_type: str, last_updated_at: Optional[datetime]):
+    """Advance an entity's high-water mark after a completed sync."""
+    state = db.get(SyncState, entity_type)
+    if state is None:
+        state = SyncState(entity_type=entity_type)
+        db.add(state)
+    if last_updated_at and (not state.last_updated_at or last_updated_at > state.last_updated_at):
+        state.last_updated_at = last_updated_at
+    state.last_synced_at = datetime.utcnow()
+    db.commit()
+
+
+def updated_since_filters(since: Optional[datetime]) -> list:
+    """Build the Guesty filter selecting records updated at or after ``since``."""
+    if since is None:
+        return []
+    return [
+        {
+            "field": "updatedAt",
+            "operator": "$gte",
+            "value": since.isoformat(timespec="milliseconds") + "Z",
+        }
+    ]
+
+
+def reservation_lookback_date() -> date:
+    """Earliest check-in date covered by reservation syncs."""
+    return (datetime.utcnow() - timedelta(days=settings.sync_lookback_years * 365)).date()
+
+
+def check_in_filters(start: date, end: Optional[date] = None) -> list:
+    """Build Guesty filters for check-ins on or after ``start`` and before ``end``."""
+    filters = [
+        {
+            "field": "checkIn",
+            "operator": "$gte",
+            "value": start.strftime("%Y-%m-%dT00:00:00Z")
+        }
+    ]
+    if end is not None:
+        filters.append({
+            "field": "checkIn",
+            "operator": "$lt",
+            "value": end.strftime("%Y-%m-%dT00:00:00Z")
+        })
+    return filters
+
+
+def item_updated_at(item: dict) -> Optional[datetime]:
+    """Get a Guesty item's last-modified time as naive UTC."""
+    raw = item.get("updatedAt") or item.get("lastUpdatedAt")
+    if not raw:
+        return None
+    updated_at = parse_iso(raw)
+    if updated_at.tzinfo is not None:
+        updated_at = updated_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return updated_at
+
+
+def fetch_pages(
+    client,
+    getter: str,
+    filters: list,
+    start_skip: int = 0,
+    stats: Optional[RequestStats] = None,
+) -> Iterator[list[dict]]:
+    """
+    Yield result pages from a Guesty collection getter.
+
+    Pages are requested concurrently when ``guesty_page_concurrency`` is above
+    one, otherwise one after another through ``client``. Request statistics
+    are added to ``stats`` when given.
+    """
+    if settings.guesty_page_concurrency > 1:
+        return iter_pages_concurrently(getter, filters or None, start_skip=start_skip, stats=stats)
+    return client.iter_pages(getter, filters or None, start_skip=start_skip, stats=stats)
+
+
+def open_checkpoint(
+    db: Session,
+    sync_log_id: int,
+    entity_type: str,
+    filters: list,
+    sync_window_id: Optional[int] = None,
+) -> SyncCheckpoint:
+    """Get the checkpoint of an entity (or window) within a run, creating it if new."""
+    checkpoint = db.query(SyncCheckpoint).filter(
+        SyncCheckpoint.sync_log_id == sync_log_id,
+        SyncCheckpoint.entity_type == entity_type,
+        SyncCheckpoint.sync_window_id == sync_window_id,
+    ).first()
+    if checkpoint is None:
+        checkpoint = SyncCheckpoint(
+            sync_log_id=sync_log_id,
+            sync_window_id=sync_window_id,
+            entity_type=entity_type,
+            filters=json.dumps(filters),
+            next_skip=0,
+            pages_committed=0,
+            completed=False,
+        )
+        db.add(checkpoint)
+        db.commit()
+    return checkpoint
+
+
+def sync_pages(
+    db: Session,
+    model,
+    pages: Iterable[list[dict]],
+    to_row: Callable[[dict], dict],
+    progress=None,
+    checkpoint: Optional[SyncCheckpoint] = None,
+    metrics: Optional[StageMetrics] = None,
+) -> tuple[int, Optional[datetime]]:
+    """
+    Upsert each page of Guesty items.
+
+    Fetching and transformation run ahead of the database writes in a
+    bounded pipeline (see ``pipeline_pages``). For BULK_LOAD_MODELS with
+    ``sync_copy_threshold`` set, pages are buffered and committed together
+    once they add up to that many rows, so each write is a COPY bulk load.
+
+    Args:
+        db: Database session
+        model: ORM model the rows are written to
+        pages: Iterable of raw Guesty result pages
+        to_row: Transforms one Guesty item into column values
+        progress: SyncLog or SyncWindow row whose counts are updated per write
+        checkpoint: Advanced in the same transaction as each committed write
+        metrics: Receives transform, write and commit timings
+
+    Returns:
+        Tuple of (records written, highest item updatedAt seen). Callers save
+        the watermark only after every page is committed, so a failed run is
+        picked up again by the next incremental sync.
+    """
+    count = 0
+    high_water = checkpoint.last_updated_at if checkpoint is not None else None
+
+    # Bulk-loaded models buffer pages until a batch is large enough to COPY
+    batch_rows = settings.sync_copy_threshold if model in BULK_LOAD_MODELS else 0
+    batch_items: list[dict] = []
+    batch: list[dict] = []
+    batch_pages = 0
+
+    def write_batch():
+        nonlocal count, high_water, batch_items, batch, batch_pages
+        started = time.perf_counter()
+        inserted, updated, unchanged = upsert_rows(db, model, batch)
+        written = time.perf_counter()
+        count += inserted + updated + unchanged
+
+        for item in batch_items:
+            updated_at = item_updated_at(item)
+            if updated_at and (high_water is None or updated_at > high_water):
+                high_water = updated_at
+
+        if checkpoint is not None:
+            checkpoint.next_skip = (checkpoint.next_skip or 0) + len(batch_items)
+            checkpoint.last_guesty_id = batch_items[-1].get("_id")
+            checkpoint.last_updated_at = high_water
+            checkpoint.pages_committed = (checkpoint.pages_committed or 0) + batch_pages
+        record_page(db, progress, inserted, updated, unchanged)
+        if metrics is not None:
+            metrics.add_write(len(batch), written - started, time.perf_counter() - written)
+        batch_items, batch, batch_pages = [], [], 0
+
+    for items, rows in pipeline_pages(pages, to_row, settings.sync_pipeline_depth, metrics):
+        batch_items.extend(items)
+        batch.extend(rows)
+        batch_pages += 1
+        if len(batch) >= batch_rows:
+            write_batch()
+
+    if batch_items:
+        write_batch()
+
+    return count, high_water
+
+
+def sync_entity(
+    db: Session,
+    client,
+    entity_type: str,
+    model,
+    getter: str,
+    filters: list,
+    to_row: Callable[[dict], dict],
+    sync_log: Optional[SyncLog] = None,
+    replay_of: Optional[int] = None,
+) -> int:
+    """
+    Sync one entity, resuming from its checkpoint when ``sync_log`` is being resumed.
+
+    A resumed entity pages with the filters stored in its checkpoint, so the
+    skip offsets line up with the interrupted run. With ``replay_of`` the pages
+    landed by that earlier run are re-loaded from disk instead of Guesty.
+    """
+    metrics = StageMetrics()
+    status = "failed"
+    try:
+        count = _sync_entity_pages(
+            db, client, entity_type, model, getter, filters, to_row, sync_log, replay_of, metrics,
+        )
+        status = "success"
+        return count
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if sync_log is not None:
+            metrics.save(db, sync_log.id, entity_type, status)
+
+
+def _sync_entity_pages(
+    db: Session,
+    client,
+    entity_type: str,
+    model,
+    getter: str,
+    filters: list,
+    to_row: Callable[[dict], dict],
+    sync_log: Optional[SyncLog],
+    replay_of: Optional[int],
+    metrics: StageMetrics,
+) -> int:
+    """Body of ``sync_entity``, with stage timings collected into ``metrics``."""
+    if replay_of is not None:
+        count, _ = sync_pages(
+            db, model, replay_pages(replay_of, entity_type), to_row, sync_log, metrics=metrics,
+        )
+        return count
+
+    checkpoint = None
+    start_skip = 0
+    if sync_log is not None:
+        checkpoint = open_checkpoint(db, sync_log.id, entity_type, filters)
+        if checkpoint.completed:
+            logger.info(f"Skipping {entity_type}: already completed in this run")
+            return 0
+        filters = json.loads(checkpoint.filters) if checkpoint.filters else []
+        start_skip = checkpoint.next_skip or 0
+        if start_skip:
+            logger.info(f"Resuming {entity_type} at skip={start_skip} after {checkpoint.last_guesty_id}")
+
+    pages = fetch_pages(client, getter, filters, start_skip, metrics.requests)
+    if sync_log is not None and landing_enabled():
+        pages = land_pages(pages, sync_log.id, entity_type, start_skip)
+
+    count, high_water = sync_pages(db, model, pages, to_row, sync_log, checkpoint, metrics)
+
+    if checkpoint is not None:
+        checkpoint.completed = True
+    save_watermark(db, entity_type, high_water)
+    return count
+
+
+def sync_listings(
+    db: Session,
+    client,
+    sync_log: Optional[SyncLog] = None,
+    incremental: bool = False,
+    replay_of: Optional[int] = None,
+) -> int:
     """Sync listings from Guesty."""
     logger.info("Starting listings sync")
-    count = 0
-    skip = 0
-    limit = 100
-    
-    while True:
-        result = client.get_listings(skip=skip, limit=limit)
-        listings = result.get("results", [])
-        
-        if not listings:
-            break
-        
-        for item in listings:
-            existing = db.query(Listing).filter(
-                Listing.guesty_id == item["_id"]
-            ).first()
-            
-            if existing:
-                existing.name = item.get("title", "")
-                existing.bedrooms = item.get("bedrooms", 0)
-                existing.bathrooms = item.get("bathrooms", 0)
-                existing.property_type = item.get("propertyType", "")
-                existing.active = item.get("active", True)
-                existing.address = item.get("address", {}).get("full", "")
-                existing.updated_at = datetime.utcnow()
-            else:
-                listing = Listing(
-                    id=str(uuid.uuid4()),
-                    guesty_id=item["_id"],
-                    name=item.get("title", ""),
-                    bedrooms=item.get("bedrooms", 0),
-                    bathrooms=item.get("bathrooms", 0),
-                    property_type=item.get("propertyType", ""),
-                    active=item.get("active", True),
-                    address=item.get("address", {}).get("full", ""),
-                )
-                db.add(listing)
-            count += 1
-        
-        db.commit()
-        
-        if len(listings) < limit:
-            break
-        skip += limit
-    
+    since = get_watermark(db, "listings") if incremental else None
+
+    count = sync_entity(
+        db, client, "listings", Listing, "get_listings",
+        updated_since_filters(since), listing_row, sync_log, replay_of,
+    )
+
     logger.info(f"Synced {count} listings")
     return count
 
 
-def sync_guests(db: Session, client) -> int:
+def sync_guests(
+    db: Session,
+    client,
+    sync_log: Optional[SyncLog] = None,
+    incremental: bool = False,
+    replay_of: Optional[int] = None,
+) -> int:
     """Sync guests from Guesty (with PII hashing)."""
     logger.info("Starting guests sync")
-    count = 0
-    skip = 0
-    limit = 100
-    
-    while True:
-        result = client.get_guests(skip=skip, limit=limit)
-        guests = result.get("results", [])
-        
-        if not guests:
-            break
-        
-        for item in guests:
-            existing = db.query(Guest).filter(
-                Guest.guesty_id == item["_id"]
-            ).first()
-            
-            email_hash = hash_email(item.get("email"))
-            
-            if existing:
-                existing.email_hash = email_hash
-                existing.updated_at = datetime.utcnow()
-            else:
-                guest = Guest(
-                    id=str(uuid.uuid4()),
-                    guesty_id=item["_id"],
-                    email_hash=email_hash,
-                )
-                db.add(guest)
-            count += 1
-        
-        db.commit()
-        
-        if len(guests) < limit:
-            break
-        skip += limit
-    
+    since = get_watermark(db, "guests") if incremental else None
+
+    count = sync_entity(
+        db, client, "guests", Guest, "get_guests",
+        updated_since_filters(since), guest_row, sync_log, replay_of,
+    )
+
     logger.info(f"Synced {count} guests")
     return count
 
 
-def sync_reservations(db: Session, client) -> int:
+def sync_reservations(
+    db: Session,
+    client,
+    sync_log: Optional[SyncLog] = None,
+    incremental: bool = False,
+    replay_of: Optional[int] = None,
+) -> int:
     """Sync reservations from Guesty with calculated fields."""
     logger.info("Starting reservations sync")
-    count = 0
-    skip = 0
-    limit = 100
-    
+    since = get_watermark(db, "reservations") if incremental else None
+
     # Get data from last N years
-    lookback_date = datetime.utcnow() - timedelta(days=settings.sync_lookback_years * 365)
-    filters = [
-        {
-            "field": "checkIn",
-            "operator": "$gte",
-            "value": lookback_date.strftime("%Y-%m-%dT00:00:00Z")
-        }
-    ]
-    
-    # Build lookup maps for foreign keys
-    listing_map = {l.guesty_id: l.id for l in db.query(Listing).all()}
-    guest_map = {g.guesty_id: g.id for g in db.query(Guest).all()}
-    
-    while True:
-        result = client.get_reservations(skip=skip, limit=limit, filters=filters)
-        reservations = result.get("results", [])
-        
-        if not reservations:
-            break
-        
-        for item in reservations:
-            existing = db.query(Reservation).filter(
-                Reservation.guesty_id == item["_id"]
-            ).first()
-            
-            # Parse dates
-            check_in = datetime.fromisoformat(item["checkIn"].replace("Z", "+00:00")).date()
-            check_out = datetime.fromisoformat(item["checkOut"].replace("Z", "+00:00")).date()
-            created_at_raw = (
-                item.get("createdAt")
-                or item.get("bookedAt")
-                or item.get("confirmedAt")
-                or item.get("created_at")
-            )
-            if created_at_raw:
-                booked_at = datetime.fromisoformat(created_at_raw.replace("Z", "+00:00"))
-            else:
-                # Fallback to check-in date to avoid hard failure
-                booked_at = datetime.combine(check_in, datetime.min.time())
-            
-            # Calculate fields
-            nights = (check_out - check_in).days
-            lead_time_days = (check_in - booked_at.date()).days
-            
-            # Get price in cents
-            money = item.get("money", {})
-            total_price = int(float(money.get("totalPrice", 0)) * 100)
-            
-            # Normalize source
-            source = normalize_source(item.get("source", "unknown"))
-            
-            # Map status
-            status = item.get("status", "confirmed")
-            
-            # Get foreign keys
-            listing_guesty_id = item.get("listingId")
-            guest_guesty_id = item.get("guestId")
-            listing_id = listing_map.get(listing_guesty_id)
-            guest_id = guest_map.get(guest_guesty_id)
-            
-            # Handle cancelled_at
-            cancelled_at = None
-            if status == "cancelled" and item.get("canceledAt"):
-                cancelled_at = datetime.fromisoformat(item["canceledAt"].replace("Z", "+00:00"))
-            
-            if existing:
-                existing.listing_id = listing_id
-                existing.guest_id = guest_id
-                existing.source = source
-                existing.status = status
-                existing.check_in = check_in
-                existing.check_out = check_out
-                existing.booked_at = booked_at
-                existing.total_price = total_price
-                existing.nights = nights
-                existing.lead_time_days = lead_time_days
-                existing.cancelled_at = cancelled_at
-                existing.updated_at = datetime.utcnow()
-            else:
-                reservation = Reservation(
-                    id=str(uuid.uuid4()),
-                    guesty_id=item["_id"],
-                    listing_id=listing_id,
-                    guest_id=guest_id,
-                    source=source,
-                    status=status,
-                    check_in=check_in,
-                    check_out=check_out,
-                    booked_at=booked_at,
-                    total_price=total_price,
-                    nights=nights,
-                    lead_time_days=lead_time_days,
-                    cancelled_at=cancelled_at,
-                )
-                db.add(reservation)
-            count += 1
-        
-        db.commit()
-        
-        if len(reservations) < limit:
-            break
-        skip += limit
-    
+    filters = check_in_filters(reservation_lookback_date()) + updated_since_filters(since)
+
+    count = sync_entity(
+        db, client, "reservations", Reservation, "get_reservations", filters,
+        reservation_row, sync_log, replay_of,
+    )
+
     logger.info(f"Synced {count} reservations")
     return count
 
 
-def sync_conversations(db: Session, client) -> int:
+def sync_conversations(
+    db: Session,
+    client,
+    sync_log: Optional[SyncLog] = None,
+    incremental: bool = False,
+    replay_of: Optional[int] = None,
+) -> int:
     """Sync conversations from Guesty."""
     logger.info("Starting conversations sync")
-    count = 0
-    skip = 0
-    limit = 100
-    
-    # Build lookup maps
-    listing_map = {l.guesty_id: l.id for l in db.query(Listing).all()}
-    guest_map = {g.guesty_id: g.id for g in db.query(Guest).all()}
-    reservation_map = {r.guesty_id: r.id for r in db.query(Reservation).all()}
-    
-    while True:
-        result = client.get_conversations(skip=skip, limit=limit)
-        conversations = result.get("results", [])
-        
-        if not conversations:
-            break
-        
-        for item in conversations:
-            existing = db.query(Conversation).filter(
-                Conversation.guesty_id == item["_id"]
-            ).first()
-            
-            # Get foreign keys
-            listing_guesty_id = item.get("listingId")
-            guest_guesty_id = item.get("guestId")
-            reservation_guesty_id = item.get("reservationId")
-            
-            listing_id = listing_map.get(listing_guesty_id)
-            guest_id = guest_map.get(guest_guesty_id)
-            reservation_id = reservation_map.get(reservation_guesty_id)
-            
-            # Normalize source
-            source = normalize_source(item.get("source", "unknown"))
-            
-            # Check if converted to booking
-            converted_to_booking = reservation_id is not None
-            
-            # Parse first message time
-            first_message_at = None
-            if item.get("createdAt"):
-                first_message_at = datetime.fromisoformat(item["createdAt"].replace("Z", "+00:00"))
-            
-            message_count = item.get("messageCount", 0)
-            
-            if existing:
-                existing.listing_id = listing_id
-                existing.guest_id = guest_id
-                existing.reservation_id = reservation_id
-                existing.source = source
-                existing.converted_to_booking = converted_to_booking
-                existing.first_message_at = first_message_at
-                existing.message_count = message_count
-                existing.updated_at = datetime.utcnow()
-            else:
-                conversation = Conversation(
-                    id=str(uuid.uuid4()),
-                    guesty_id=item["_id"],
-                    listing_id=listing_id,
-                    guest_id=guest_id,
-                    reservation_id=reservation_id,
-                    source=source,
-                    converted_to_booking=converted_to_booking,
-                    first_message_at=first_message_at,
-                    message_count=message_count,
-                )
-                db.add(conversation)
-            count += 1
-        
-        db.commit()
-        
-        if len(conversations) < limit:
-            break
-        skip += limit
-    
+    since = get_watermark(db, "conversations") if incremental else None
+
+    count = sync_entity(
+        db, client, "conversations", Conversation, "get_conversations",
+        updated_since_filters(since), conversation_row, sync_log, replay_of,
+    )
+
     logger.info(f"Synced {count} conversations")
     return count
 
 
-def run_full_sync():
-    """Run a complete sync of all entities."""
-    logger.info("Starting full data sync")
+def _resumable_sync_log(db: Session) -> Optional[SyncLog]:
+    """
+    Get the latest full or incremental run if it failed and can be resumed.
+
+    Runs limited to some entities (``incremental:reservations,...``) count
+    too. A failed run is not resumed once any later run has succeeded, as
+    its page offsets no longer match the data.
+    """
+    last = db.query(SyncLog).filter(or_(
+        SyncLog.entity_type.in_(("full", "incremental")),
+        SyncLog.entity_type.like("full:%"),
+        SyncLog.entity_type.like("incremental:%"),
+    )).order_by(desc(SyncLog.started_at)).first()
+    if last is None or last.status != "failed":
+        return None
+    newer_success = db.query(SyncLog.id).filter(
+        SyncLog.status == "success",
+        SyncLog.started_at > last.started_at,
+    ).first()
+    return last if newer_success is None else None
+
+
+def _parse_sync_mode(entity_type: str) -> tuple[bool, Optional[list[str]]]:
+    """(incremental, entities) of a run from its ``_sync_mode`` entity_type."""
+    mode, _, names = entity_type.partition(":")
+    return mode == "incremental", names.split(",") if names else None
+
+
+def referenced_guest_ids(db: Session, changed_since: Optional[datetime] = None) -> list[str]:
+    """
+    Guesty ids of guests that reservations or conversations need fetched.
+
+    These are guests that are referenced but not stored yet. With
+    ``changed_since`` they also include stored guests older than
+    ``sync_guest_refresh_days`` that are referenced by records changed since
+    then.
+    """
+    queries = [
+        select(model.guest_guesty_id).where(model.guest_id.is_(None), model.guest_guesty_id.isnot(None))
+        for model in (Reservation, Conversation)
+    ]
+    if changed_since is not None:
+        stale_before = datetime.utcnow() - timedelta(days=settings.sync_guest_refresh_days)
+        for model in (Reservation, Conversation):
+            queries.append(
+                select(model.guest_guesty_id)
+                .join(Guest, Guest.id == model.guest_id)
+                .where(model.updated_at >= changed_since, Guest.updated_at < stale_before)
+            )
+    return list(db.execute(union(*queries)).scalars())
+
+
+def fetch_guests_by_id(client, guest_ids: list[str], stats: Optional[RequestStats] = None) -> Iterator[list[dict]]:
+    """Yield pages of the given guests, requested in batches of one page each."""
+    for start in range(0, len(guest_ids), GUEST_BATCH_SIZE):
+        batch = guest_ids[start:start + GUEST_BATCH_SIZE]
+        filters = [{"field": "_id", "operator": "$in", "value": batch}]
+        items = client.get_guests(skip=0, limit=len(batch), filters=filters, stats=stats).get("results", [])
+        if items:
+            yield items
+
+
+def link_guests(db: Session) -> int:
+    """Point reservations and conversations at guests stored after them."""
+    linked = 0
+    for model in (Reservation, Conversation):
+        result = db.execute(
+            update(model)
+            .where(model.guest_id.is_(None), model.guest_guesty_id == Guest.guesty_id)
+            .values(guest_id=Guest.id)
+        )
+        linked += result.rowcount
+    db.commit()
+    return linked
+
+
+def sync_referenced_guests(
+    db: Session,
+    client,
+    sync_log: Optional[SyncLog] = None,
+    incremental: bool = False,
+    replay_of: Optional[int] = None,
+) -> int:
+    """
+    Sync only the guests that synced reservations and conversations reference.
+
+    Used instead of ``sync_guests`` when ``sync_guests_mode`` is "lazy", after
+    reservations and conversations, so the guest directory is never paged
+    in full. Missing guests are fetched by id; stored ones are refreshed
+    only when a record changed in this run references them and they are
+    older than ``sync_guest_refresh_days``.
+    """
+    logger.info("Starting referenced guests sync")
+    metrics = StageMetrics()
+
+    if replay_of is not None:
+        pages = replay_pages(replay_of, "guests")
+    else:
+        guest_ids = referenced_guest_ids(db, sync_log.started_at if sync_log is not None else None)
+        logger.info(f"Fetching {len(guest_ids)} missing or stale guests")
+        pages = fetch_guests_by_id(client, guest_ids, metrics.requests)
+        if sync_log is not None and landing_enabled():
+            pages = land_pages(pages, sync_log.id, "guests")
+
+    status = "failed"
+    try:
+        count, _ = sync_pages(db, Guest, pages, guest_row, sync_log, metrics=metrics)
+        linked = link_guests(db)
+        status = "success"
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        if sync_log is not None:
+            metrics.save(db, sync_log.id, "guests", status)
+
+    logger.info(f"Synced {count} guests, linked {linked} records to them")
+    return count
+
+
+# Entity syncs in dependency order
+ENTITY_SYNCS = {
+    "listings": sync_listings,
+    "guests": sync_guests,
+    "reservations": sync_reservations,
+    "conversations": sync_conversations,
+}
+
+
+def entity_syncs() -> dict[str, Callable]:
+    """ENTITY_SYNCS for the configured ``sync_guests_mode``."""
+    if settings.sync_guests_mode != "lazy":
+        return ENTITY_SYNCS
+    # Guests are looked up from the records that reference them, so go last
+    syncs = {name: sync for name, sync in ENTITY_SYNCS.items() if name != "guests"}
+    syncs["guests"] = sync_referenced_guests
+    return syncs
+
+
+def _ran_within(db: Session, mode: str, min_interval: timedelta) -> bool:
+    """Check whether a run of ``mode`` started within ``min_interval``."""
+    return db.query(SyncLog.id).filter(
+        SyncLog.entity_type == mode,
+        SyncLog.started_at >= datetime.utcnow() - min_interval,
+    ).first() is not None
+
+
+def fail_interrupted_runs(db: Session):
+    """
+    Mark runs left "running" by a dead process as failed, so they can be resumed.
+
+    Only call this while holding the sync lease, when no run can be live.
+    """
+    for sync_log in db.query(SyncLog).filter(SyncLog.status == "running"):
+        sync_log.status = "failed"
+        sync_log.error_message = "Interrupted before completion"
+        sync_log.completed_at = datetime.utcnow()
+    db.commit()
+
+
+def run_sync(
+    incremental: bool = False,
+    resume: bool = False,
+    replay_of: Optional[int] = None,
+    entities: Optional[Sequence[str]] = None,
+    min_interval: Optional[timedelta] = None,
+) -> bool:
+    """
+    Run a sync while holding the cluster-wide sync lease.
+
+    Only one process syncs at a time: if another one holds the lease the
+    call returns without doing anything. See ``_run_sync`` for the arguments.
+
+    Args:
+        min_interval: Skip the run if the same mode already started this
+            recently, e.g. in another worker on the same scheduler tick.
+
+    Returns:
+        True if the sync ran
+    """
+    with advisory_lease(SYNC_LEASE) as acquired:
+        if not acquired:
+            logger.info("Another process holds the sync lease; skipping")
+            return False
+
+        db = SessionLocal()
+        try:
+            if min_interval is not None and _ran_within(
+                db, _sync_mode(incremental, replay_of, entities), min_interval
+            ):
+                logger.info("Sync already ran recently; skipping")
+                return False
+            fail_interrupted_runs(db)
+        finally:
+            db.close()
+
+        _run_sync(incremental, resume, replay_of, entities)
+        return True
+
+
+def _sync_mode(incremental: bool, replay_of: Optional[int], entities: Optional[Sequence[str]]) -> str:
+    """SyncLog entity_type of a new run, e.g. ``incremental:reservations,conversations``."""
+    if replay_of is not None:
+        mode = "replay"
+    else:
+        mode = "incremental" if incremental else "full"
+    if entities is not None:
+        mode = f"{mode}:{','.join(entities)}"
+    return mode
+
+
+def _run_sync(
+    incremental: bool = False,
+    resume: bool = False,
+    replay_of: Optional[int] = None,
+    entities: Optional[Sequence[str]] = None,
+):
+    """
+    Run a sync of all entities, or of ``entities`` only.
+
+    Args:
+        incremental: Only fetch records updated since each entity's stored
+            watermark. Entities without a watermark are fetched in full.
+        resume: Continue the last failed run from its page checkpoints,
+            in that run's mode and with its entities, instead of starting
+            over. Starts a new run if there is nothing to resume.
+        replay_of: Re-run transformation and loading from the pages landed
+            by this earlier run, without calling Guesty. Watermarks and
+            checkpoints are left untouched.
+        entities: Names from ENTITY_SYNCS to sync; defaults to all of them
+    """
     db = SessionLocal()
-    
+
     try:
         client = get_guesty_client()
-        
-        # Create sync log entry
-        sync_log = SyncLog(
-            entity_type="full",
-            started_at=datetime.utcnow(),
-            status="running",
-        )
-        db.add(sync_log)
+
+        sync_log = _resumable_sync_log(db) if resume else None
+        if sync_log is not None:
+            incremental, entities = _parse_sync_mode(sync_log.entity_type)
+            sync_log.status = "running"
+            sync_log.error_message = None
+            sync_log.completed_at = None
+            logger.info(f"Resuming {sync_log.entity_type} sync {sync_log.id}")
+        else:
+            # Create sync log entry
+            sync_log = SyncLog(
+                entity_type=_sync_mode(incremental, replay_of, entities),
+                started_at=datetime.utcnow(),
+                status="running",
+                records_synced=0,
+                records_inserted=0,
+                records_updated=0,
+                records_unchanged=0,
+            )
+            db.add(sync_log)
+            logger.info(f"Starting {sync_log.entity_type} data sync")
         db.commit()
-        
-        total_records = 0
-        
-        # Sync in order (dependencies first)
-        total_records += sync_listings(db, client)
-        total_records += sync_guests(db, client)
-        total_records += sync_reservations(db, client)
-        total_records += sync_conversations(db, client)
-        
+        mode = sync_log.entity_type.split(":")[0]
+
+        # Sync in order (dependencies first); each page updates the log counts
+        for name, sync in entity_syncs().items():
+            if entities is None or name in entities:
+                sync(db, client, sync_log, incremental, replay_of)
+
+        # Rebuild the analytics rollup for the check-in days this run touched,
+        # before the run's success moves analytics to a new data generation
+        refresh_daily_facts(db)
+
         # Update sync log
-        sync_log.records_synced = total_records
         sync_log.completed_at = datetime.utcnow()
         sync_log.status = "success"
         db.commit()
-        
-        logger.info(f"Full sync completed successfully. Total records: {total_records}")
-        
+        data_generation.advance(db)
+
+        logger.info(
+            f"{mode.capitalize()} sync completed successfully. Total records: {sync_log.records_synced} "
+            f"({sync_log.records_inserted} inserted, {sync_log.records_updated} updated, "
+            f"{sync_log.records_unchanged} unchanged)"
+        )
+
     except Exception as e:
         logger.error(f"Sync failed: {e}")
-        
+        db.rollback()
+
         # Update sync log with error
         sync_log = db.query(SyncLog).filter(SyncLog.status == "running").first()
         if sync_log:
@@ -357,7 +922,27 @@ def run_full_sync():
             sync_log.error_message = str(e)
             sync_log.completed_at = datetime.utcnow()
             db.commit()
-        
+
         raise
     finally:
         db.close()
+
+
+def run_full_sync() -> bool:
+    """Run a complete sync of all entities, ignoring stored watermarks."""
+    return run_sync(incremental=False)
+
+
+def run_incremental_sync() -> bool:
+    """Sync only records changed since the last successful sync of each entity."""
+    return run_sync(incremental=True)
+
+
+def resume_sync() -> bool:
+    """Continue the last failed sync from its page checkpoints."""
+    return run_sync(resume=True)
+
+
+def run_replay(sync_log_id: int) -> bool:
+    """Reload every entity from the pages landed by an earlier run."""
+    return run_sync(replay_of=sync_log_id)
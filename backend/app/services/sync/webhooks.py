@@ -0,0 +1,263 @@
+"""Micro-batched ingestion of Guesty webhook events."""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import logging
+import threading
+import time
+from typing import Optional
+
+from app.config import get_settings
+from app.database.connection import SessionLocal
+from app.database.models import Listing, Reservation, Conversation
+from app.services.analytics_cache import data_generation
+from app.services.sync.rollup import refresh_daily_facts
+from app.services.sync.sync_service import (
+    conversation_row,
+    listing_row,
+    reservation_row,
+    upsert_rows,
+)
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Flushes a record may fail before its payload is dropped
+WEBHOOK_MAX_ATTEMPTS = 5
+
+# Payload key -> (model, row transform), in the order batches are written so
+# that reservations and conversations can resolve the listings flushed with them
+WEBHOOK_ENTITIES = {
+    "listing": (Listing, listing_row),
+    "reservation": (Reservation, reservation_row),
+    "conversation": (Conversation, conversation_row),
+}
+
+
+def verify_signature(body: bytes, headers) -> bool:
+    """
+    Check a webhook's Svix signature against ``guesty_webhook_secret``.
+    
+    Fails when no secret is configured, and when the signed timestamp is
+    more than ``webhook_tolerance_seconds`` away from now, so a captured
+    request cannot be replayed later.
+    """
+    secret = settings.guesty_webhook_secret
+    if not secret:
+        return False
+    
+    message_id = headers.get("svix-id") or headers.get("webhook-id")
+    timestamp = headers.get("svix-timestamp") or headers.get("webhook-timestamp")
+    signatures = headers.get("svix-signature") or headers.get("webhook-signature")
+    if not (message_id and timestamp and signatures):
+        return False
+    try:
+        if abs(time.time() - int(timestamp)) > settings.webhook_tolerance_seconds:
+            return False
+    except ValueError:
+        return False
+    
+    key = base64.b64decode(secret.removeprefix("whsec_"))
+    signed = f"{message_id}.{timestamp}.".encode() + body
+    expected = base64.b64encode(hmac.new(key, signed, hashlib.sha256).digest()).decode()
+    
+    for signature in signatures.split():
+        _, _, value = signature.partition(",")
+        if hmac.compare_digest(value, expected):
+            return True
+    return False
+
+
+class WebhookBuffer:
+    """
+    In-process queue of webhook entities, coalesced per guesty_id.
+    
+    Only the latest payload of each record is kept until the next flush, so a
+    burst of updates to one reservation costs a single row write. A background
+    task flushes every ``webhook_flush_seconds``, or sooner once
+    ``webhook_batch_size`` records are waiting, through the same row
+    transforms and upserts as the API sync.
+    """
+    
+    def __init__(self, batch_size: int, flush_seconds: float):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._pending: dict[str, dict[str, dict]] = {key: {} for key in WEBHOOK_ENTITIES}
+        self._lock = threading.Lock()
+        self._full: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._attempts: dict[tuple[str, str], int] = {}
+        self.received = 0
+        self.written = 0
+        self.dropped = 0
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(items) for items in self._pending.values())
+    
+    def add(self, payload: dict) -> int:
+        """
+        Queue the entities carried by one webhook payload.
+        
+        Returns:
+            Number of entities queued
+        """
+        queued = 0
+        with self._lock:
+            for key in WEBHOOK_ENTITIES:
+                item = payload.get(key)
+                if isinstance(item, dict) and item.get("_id"):
+                    self._pending[key][item["_id"]] = item
+                    queued += 1
+            self.received += queued
+            size = sum(len(items) for items in self._pending.values())
+        
+        if self._full is not None and size >= self.batch_size:
+            self._full.set()
+        return queued
+    
+    def _drain(self) -> dict[str, list[dict]]:
+        with self._lock:
+            drained = {key: list(items.values()) for key, items in self._pending.items()}
+            self._pending = {key: {} for key in WEBHOOK_ENTITIES}
+        return drained
+    
+    def _rows(self, key: str, items: list[dict]) -> list[tuple[dict, dict]]:
+        """(payload, row) pairs of the items that transform into rows."""
+        _, to_row = WEBHOOK_ENTITIES[key]
+        rows = []
+        for item in items:
+            try:
+                rows.append((item, to_row(item)))
+            except Exception as e:
+                # Partial payloads (missing or null fields) are picked up by the next API sync
+                self.dropped += 1
+                logger.warning(f"Skipping {key} webhook {item.get('_id')}: {e}")
+        return rows
+    
+    def _requeue(self, failed: list[tuple[str, dict]]):
+        """Queue failed items for the next flush, unless newer payloads arrived or they ran out of attempts."""
+        with self._lock:
+            for key, item in failed:
+                attempts = self._attempts.get((key, item["_id"]), 0) + 1
+                if attempts >= WEBHOOK_MAX_ATTEMPTS:
+                    self._attempts.pop((key, item["_id"]), None)
+                    self.dropped += 1
+                    logger.error(f"Dropping {key} webhook {item['_id']} after {attempts} failed writes")
+                    continue
+                self._attempts[(key, item["_id"])] = attempts
+                self._pending[key].setdefault(item["_id"], item)
+    
+    def flush(self) -> int:
+        """
+        Write every queued entity; blocking, returns records written.
+        
+        The batch is written in one transaction. If that fails, each row is
+        written on its own, so one bad row does not lose the others, and
+        rows that still fail are queued again for the next flush. A flush
+        that wrote reservations refreshes the daily rollup, and one that
+        wrote anything then starts a new data generation.
+        """
+        drained = {key: self._rows(key, items) for key, items in self._drain().items()}
+        if not any(drained.values()):
+            return 0
+        
+        written = 0
+        wrote_reservations = False
+        failed = []
+        db = SessionLocal()
+        try:
+            try:
+                for key, rows in drained.items():
+                    if rows:
+                        inserted, updated, _ = upsert_rows(db, WEBHOOK_ENTITIES[key][0], [row for _, row in rows])
+                        written += inserted + updated
+                        wrote_reservations |= key == "reservation" and bool(inserted + updated)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.warning(f"Webhook batch failed, writing rows one at a time: {e}")
+                written = 0
+                wrote_reservations = False
+                for key, rows in drained.items():
+                    for item, row in rows:
+                        try:
+                            inserted, updated, _ = upsert_rows(db, WEBHOOK_ENTITIES[key][0], [row])
+                            db.commit()
+                            written += inserted + updated
+                            wrote_reservations |= key == "reservation" and bool(inserted + updated)
+                        except Exception as e:
+                            db.rollback()
+                            failed.append((key, item))
+                            logger.error(f"Webhook {key} {item['_id']} write failed: {e}")
+            
+            failed_ids = {(key, item["_id"]) for key, item in failed}
+            with self._lock:
+                for key, rows in drained.items():
+                    for item, _ in rows:
+                        if (key, item["_id"]) not in failed_ids:
+                            self._attempts.pop((key, item["_id"]), None)
+            self._requeue(failed)
+            
+            # Refresh before advancing, so cached analytics are recomputed
+            # from a rollup that includes these reservations
+            if wrote_reservations:
+                refresh_daily_facts(db)
+            if written:
+                try:
+                    data_generation.advance(db)
+                except Exception as e:
+                    db.rollback()
+                    logger.error(f"Failed to advance the data generation after a webhook flush: {e}")
+        finally:
+            db.close()
+        
+        self.written += written
+        logger.info(f"Flushed webhook batch: {written} records written, {len(failed)} queued again")
+        return written
+    
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception:
+                # Keep flushing later batches whatever went wrong with this one
+                logger.exception("Webhook flush failed")
+    
+    def start(self):
+        """Start the background flusher on the running event loop."""
+        if self._task is None:
+            self._full = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop the flusher and write whatever is still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.to_thread(self.flush)
+    
+    def stats(self) -> dict:
+        return {
+            "pending": len(self),
+            "received": self.received,
+            "written": self.written,
+            "dropped": self.dropped,
+        }
+
+
+webhook_buffer = WebhookBuffer(
+    batch_size=settings.webhook_batch_size,
+    flush_seconds=settings.webhook_flush_seconds,
+)
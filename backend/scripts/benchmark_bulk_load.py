@@ -0,0 +1,87 @@
+"""
+Benchmark the COPY bulk-load path against per-page VALUES upserts.
+
+Writes synthetic reservations into the database configured by DATABASE_URL
+and rolls every run back, so existing data is left untouched.
+
+Usage (from backend/):
+    python -m scripts.benchmark_bulk_load --rows 100000
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from app.config import get_settings
+from app.database.connection import SessionLocal
+from app.database.models import Reservation
+from app.services.sync.sync_service import upsert_rows
+
+settings = get_settings()
+
+SOURCES = ["airbnb", "vrbo", "booking.com", "direct"]
+
+
+def synthetic_rows(count: int, seed: int = 0) -> list[dict]:
+    """Reservation rows shaped like ``reservation_row`` output."""
+    rng = random.Random(seed)
+    start = datetime(2022, 1, 1)
+    rows = []
+    for i in range(count):
+        check_in = (start + timedelta(days=rng.randrange(1000))).date()
+        nights = rng.randrange(1, 15)
+        lead_time = rng.randrange(0, 200)
+        rows.append({
+            "guesty_id": f"bench-{seed}-{i:09d}",
+            "listing_guesty_id": f"bench-listing-{rng.randrange(1000)}",
+            "guest_guesty_id": f"bench-guest-{rng.randrange(100000)}",
+            "source": rng.choice(SOURCES),
+            "status": "confirmed",
+            "check_in": check_in,
+            "check_out": check_in + timedelta(days=nights),
+            "booked_at": datetime.combine(check_in, datetime.min.time()) - timedelta(days=lead_time),
+            "total_price": rng.randrange(5000, 500000),
+            "nights": nights,
+            "lead_time_days": lead_time,
+            "cancelled_at": None,
+        })
+    return rows
+
+
+def run(rows: list[dict], batch_rows: int, copy_threshold: int) -> float:
+    """Upsert ``rows`` in batches inside one rolled-back transaction; returns seconds."""
+    settings.sync_copy_threshold = copy_threshold
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        for offset in range(0, len(rows), batch_rows):
+            upsert_rows(db, Reservation, rows[offset:offset + batch_rows])
+        # Flush the work to the server without keeping it
+        db.flush()
+        return time.perf_counter() - started
+    finally:
+        db.rollback()
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--page-size", type=int, default=100, help="Rows per VALUES upsert")
+    parser.add_argument("--copy-batch", type=int, default=5000, help="Rows per COPY bulk load")
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.rows)
+    results = {
+        "values": run(rows, args.page_size, 0),
+        "copy": run(rows, args.copy_batch, args.copy_batch),
+    }
+
+    for name, seconds in results.items():
+        print(f"{name:>6}: {seconds:8.2f}s  {args.rows / seconds:10.0f} rows/s")
+    print(f"speedup: {results['values'] / results['copy']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
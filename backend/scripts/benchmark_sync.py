@@ -0,0 +1,178 @@
+"""
+End-to-end sync benchmark against the local Guesty mock server.
+
+Starts ``scripts.guesty_mock_server`` (unless --base-url is given), then runs
+each requested sync mode in a fresh process against the database configured
+by DATABASE_URL and reports records/s and peak RSS. Use a scratch database:
+the syncs write real rows, and --truncate empties the synced tables first.
+
+Usage (from backend/):
+    python -m scripts.benchmark_sync --reservations 500000 --modes full incremental backfill
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import httpx
+
+# Sync entry point and extra environment per benchmark mode
+MODES = {
+    "full": ("run_full_sync", {}),
+    "incremental": ("run_incremental_sync", {}),
+    "backfill": ("run_reservation_backfill", {}),
+    "sequential": ("run_full_sync", {"GUESTY_PAGE_CONCURRENCY": "1"}),
+    "no-copy": ("run_full_sync", {"SYNC_COPY_THRESHOLD": "0"}),
+    "no-pipeline": ("run_full_sync", {"SYNC_PIPELINE_DEPTH": "1"}),
+}
+
+SYNCED_TABLES = [
+    "conversations", "reservations", "guests", "listings",
+    "sync_stage_metrics", "sync_checkpoints", "sync_windows", "sync_logs", "sync_state",
+]
+
+
+def run_mode(mode: str) -> dict:
+    """Run one sync mode in this process and measure it; called in a child process."""
+    from sqlalchemy import desc
+
+    from app.database.connection import SessionLocal, engine
+    from app.database.migrations import apply_added_columns
+    from app.database.models import Base, SyncLog
+    import app.services.sync as sync
+
+    Base.metadata.create_all(bind=engine)
+    apply_added_columns(engine)
+
+    started = time.perf_counter()
+    getattr(sync, MODES[mode][0])()
+    elapsed = time.perf_counter() - started
+
+    db = SessionLocal()
+    try:
+        sync_log = db.query(SyncLog).order_by(desc(SyncLog.id)).first()
+        records = sync_log.records_synced if sync_log else 0
+        status = sync_log.status if sync_log else "never_run"
+    finally:
+        db.close()
+
+    return {
+        "mode": mode,
+        "status": status,
+        "records": records,
+        "seconds": elapsed,
+        "records_per_second": records / elapsed if elapsed else 0,
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def truncate_tables():
+    from sqlalchemy import text
+
+    from app.database.connection import engine
+    from app.database.models import Base
+
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(text(f"TRUNCATE {', '.join(SYNCED_TABLES)} RESTART IDENTITY CASCADE"))
+
+
+def start_mock_server(args) -> tuple[subprocess.Popen, str]:
+    command = [
+        sys.executable, "-m", "scripts.guesty_mock_server",
+        "--port", str(args.port),
+        "--listings", str(args.listings),
+        "--reservations", str(args.reservations),
+        "--latency-ms", str(args.latency_ms),
+        "--rate-429", str(args.rate_429),
+        "--rate-401", str(args.rate_401),
+    ]
+    server = subprocess.Popen(command)
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    # Generating a large account takes a while before the port opens
+    deadline = time.monotonic() + 600
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("Mock server exited during startup")
+        try:
+            httpx.get(f"{base_url}/health", timeout=1.0)
+            return server, base_url
+        except httpx.HTTPError:
+            time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError("Mock server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", choices=sorted(MODES), default=["full", "incremental"])
+    parser.add_argument("--base-url", help="Use an already running mock server")
+    parser.add_argument("--port", type=int, default=8055)
+    parser.add_argument("--listings", type=int, default=1000)
+    parser.add_argument("--reservations", type=int, default=500_000)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--rate-401", type=float, default=0.0)
+    parser.add_argument(
+        "--guesty-rate-limits", action="store_true",
+        help="Keep Guesty's real rate limits instead of lifting them for the mock",
+    )
+    parser.add_argument("--truncate", action="store_true", help="Empty the synced tables first")
+    parser.add_argument("--child", choices=sorted(MODES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_mode(args.child)))
+        return
+
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        server, base_url = start_mock_server(args)
+
+    env = {
+        **os.environ,
+        "GUESTY_BASE_URL": base_url,
+        "GUESTY_TOKEN_URL": f"{base_url}/oauth2/token",
+        "GUESTY_CLIENT_ID": "benchmark",
+        "GUESTY_CLIENT_SECRET": "benchmark",
+    }
+    if not args.guesty_rate_limits:
+        env.update({
+            "GUESTY_RATE_LIMIT_PER_SECOND": "100000",
+            "GUESTY_RATE_LIMIT_PER_MINUTE": "0",
+            "GUESTY_RATE_LIMIT_PER_HOUR": "0",
+        })
+
+    results = []
+    try:
+        if args.truncate:
+            truncate_tables()
+        for mode in args.modes:
+            # A fresh process per mode, so peak RSS is measured per mode
+            output = subprocess.run(
+                [sys.executable, "-m", "scripts.benchmark_sync", "--child", mode],
+                env={**env, **MODES[mode][1]}, capture_output=True, text=True, check=True,
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print(f"{'mode':<12} {'status':<8} {'records':>10} {'seconds':>9} {'records/s':>10} {'peak RSS MB':>12}")
+    for r in results:
+        print(
+            f"{r['mode']:<12} {r['status']:<8} {r['records']:>10} {r['seconds']:>9.1f} "
+            f"{r['records_per_second']:>10.0f} {r['peak_rss_mb']:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+Local stand-in for the Guesty Open API, serving a synthetic account.
+
+Implements the endpoints the sync uses (token, listings, guests, reservations,
+conversations) with skip/limit paging, ``filters`` on checkIn and updatedAt,
+``_id`` ``$in`` lookups, configurable latency, and injected 429 and 401 responses. Records are
+generated deterministically from their index, so large accounts cost little
+memory and every run sees the same data.
+
+Usage (from backend/):
+    python -m scripts.guesty_mock_server --reservations 500000 --latency-ms 80 --rate-429 0.01
+
+Point the backend at it with:
+    GUESTY_BASE_URL=http://127.0.0.1:8055
+    GUESTY_TOKEN_URL=http://127.0.0.1:8055/oauth2/token
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+from array import array
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from fastapi import FastAPI, Query, Request
+from fastapi.responses import JSONResponse
+
+SOURCES = ["airbnb2", "Airbnb", "homeaway", "Booking.com", "expedia", "manual", "website"]
+PROPERTY_TYPES = ["Apartment", "House", "Condominium", "Villa", "Cabin"]
+
+# Filter operators the sync sends, applied to epoch seconds
+OPERATORS: dict[str, Callable[[int, int], bool]] = {
+    "$gte": lambda value, bound: value >= bound,
+    "$gt": lambda value, bound: value > bound,
+    "$lte": lambda value, bound: value <= bound,
+    "$lt": lambda value, bound: value < bound,
+}
+
+
+def _iso(seconds: int) -> str:
+    return datetime.fromtimestamp(seconds, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def _epoch(value: str) -> int:
+    return int(datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp())
+
+
+class SyntheticAccount:
+    """
+    Deterministic Guesty account: record ``i`` of an entity is always the same.
+    
+    Only the fields that can be filtered on are kept in memory, as compact
+    arrays of epoch seconds; full records are built per page.
+    """
+    
+    def __init__(self, listings: int, reservations: int, seed: int = 0):
+        self.seed = seed
+        self.now = int(datetime.now(timezone.utc).timestamp())
+        self.counts = {
+            "listings": listings,
+            "guests": max(1, reservations // 2),
+            "reservations": reservations,
+            "conversations": max(1, reservations // 2),
+        }
+        self.builders = {
+            "listings": self.listing,
+            "guests": self.guest,
+            "reservations": self.reservation,
+            "conversations": self.conversation,
+        }
+        self.fields: dict[str, dict[str, array]] = {}
+        for entity, count in self.counts.items():
+            fields = {"updatedAt": array("q")}
+            if entity == "reservations":
+                fields["checkIn"] = array("q")
+            for i in range(count):
+                record = self.builders[entity](i)
+                for field, values in fields.items():
+                    values.append(_epoch(record[field]))
+            self.fields[entity] = fields
+        self._matches: dict[tuple, array] = {}
+    
+    def _rng(self, entity: str, i: int) -> random.Random:
+        return random.Random(f"{self.seed}:{entity}:{i}")
+    
+    def listing(self, i: int) -> dict:
+        rng = self._rng("listings", i)
+        created = self.now - rng.randrange(365, 5 * 365) * 86400
+        return {
+            "_id": f"listing{i:08d}",
+            "title": f"Synthetic listing {i}",
+            "bedrooms": rng.randrange(0, 6),
+            "bathrooms": rng.randrange(1, 4),
+            "propertyType": rng.choice(PROPERTY_TYPES),
+            "active": rng.random() > 0.05,
+            "address": {"full": f"{i} Mock Street"},
+            "createdAt": _iso(created),
+            "updatedAt": _iso(rng.randrange(created, self.now)),
+        }
+    
+    def guest(self, i: int) -> dict:
+        rng = self._rng("guests", i)
+        updated = self.now - rng.randrange(0, 4 * 365 * 86400)
+        return {
+            "_id": f"guest{i:09d}",
+            "email": f"guest{i}@example.com",
+            "updatedAt": _iso(updated),
+        }
+    
+    def reservation(self, i: int) -> dict:
+        rng = self._rng("reservations", i)
+        check_in = self.now - rng.randrange(-365, 3 * 365) * 86400
+        check_in -= check_in % 86400
+        nights = rng.randrange(1, 15)
+        booked = check_in - rng.randrange(0, 240) * 86400 - rng.randrange(86400)
+        updated = min(self.now, rng.randrange(booked, max(booked + 1, check_in + nights * 86400)))
+        status = "cancelled" if rng.random() < 0.1 else "confirmed"
+        return {
+            "_id": f"reservation{i:09d}",
+            "listingId": f"listing{rng.randrange(self.counts['listings']):08d}",
+            "guestId": f"guest{rng.randrange(self.counts['guests']):09d}",
+            "source": rng.choice(SOURCES),
+            "status": status,
+            "checkIn": _iso(check_in),
+            "checkOut": _iso(check_in + nights * 86400),
+            "createdAt": _iso(booked),
+            "canceledAt": _iso(updated) if status == "cancelled" else None,
+            "money": {"totalPrice": round(rng.uniform(60, 600) * nights, 2)},
+            "updatedAt": _iso(updated),
+        }
+    
+    def conversation(self, i: int) -> dict:
+        rng = self._rng("conversations", i)
+        created = self.now - rng.randrange(0, 3 * 365 * 86400)
+        reservation = rng.randrange(self.counts["reservations"])
+        return {
+            "_id": f"conversation{i:09d}",
+            "listingId": f"listing{rng.randrange(self.counts['listings']):08d}",
+            "guestId": f"guest{rng.randrange(self.counts['guests']):09d}",
+            "reservationId": f"reservation{reservation:09d}" if rng.random() < 0.4 else None,
+            "source": rng.choice(SOURCES),
+            "createdAt": _iso(created),
+            "messageCount": rng.randrange(1, 30),
+            "updatedAt": _iso(rng.randrange(created, self.now + 1)),
+        }
+    
+    def matching(self, entity: str, filters: list) -> Optional[array]:
+        """Indices of the records matching ``filters``; None means all of them."""
+        for condition in filters:
+            if condition.get("field") == "_id" and condition.get("operator") == "$in":
+                return self._by_id(entity, condition["value"])
+        
+        conditions = []
+        for condition in filters:
+            values = self.fields[entity].get(condition.get("field"))
+            compare = OPERATORS.get(condition.get("operator"))
+            if values is None or compare is None:
+                continue
+            conditions.append((values, compare, _epoch(condition["value"])))
+        if not conditions:
+            return None
+        
+        key = (entity, json.dumps(filters, sort_keys=True))
+        if key not in self._matches:
+            self._matches[key] = array("q", (
+                i for i in range(self.counts[entity])
+                if all(compare(values[i], bound) for values, compare, bound in conditions)
+            ))
+        return self._matches[key]
+    
+    def _by_id(self, entity: str, ids: list) -> array:
+        """Indices of the given ``_id`` values, which encode the index after the entity prefix."""
+        prefix = entity[:-1]
+        indices = array("q")
+        for record_id in ids:
+            suffix = str(record_id).removeprefix(prefix)
+            if suffix.isdigit() and int(suffix) < self.counts[entity]:
+                indices.append(int(suffix))
+        return indices
+    
+    def page(self, entity: str, skip: int, limit: int, filters: list) -> dict:
+        indices = self.matching(entity, filters)
+        total = self.counts[entity] if indices is None else len(indices)
+        selected = range(skip, min(skip + limit, total))
+        build = self.builders[entity]
+        results = [build(i if indices is None else indices[i]) for i in selected]
+        return {"results": results, "count": total, "skip": skip, "limit": limit}
+
+
+def create_app(
+    account: SyntheticAccount,
+    latency_ms: float = 0,
+    jitter_ms: float = 0,
+    rate_429: float = 0,
+    rate_401: float = 0,
+    seed: int = 0,
+) -> FastAPI:
+    """Build the mock API around ``account`` with the given latency and fault rates."""
+    app = FastAPI(title="Guesty mock")
+    rng = random.Random(seed)
+    token_ids = itertools.count(1)
+    tokens: set[str] = set()
+    stats = {"requests": 0, "429": 0, "401": 0, "tokens": 0}
+    
+    @app.middleware("http")
+    async def latency_and_faults(request: Request, call_next):
+        if request.url.path in ("/oauth2/token", "/health"):
+            return await call_next(request)
+        
+        stats["requests"] += 1
+        delay = latency_ms + rng.uniform(-jitter_ms, jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        
+        authorization = request.headers.get("Authorization", "")
+        if authorization.removeprefix("Bearer ") not in tokens or rng.random() < rate_401:
+            stats["401"] += 1
+            return JSONResponse({"error": "Unauthorized"}, status_code=401)
+        if rng.random() < rate_429:
+            stats["429"] += 1
+            return JSONResponse({"error": "Too Many Requests"}, status_code=429, headers={"Retry-After": "1"})
+        return await call_next(request)
+    
+    @app.post("/oauth2/token")
+    async def token():
+        access_token = f"mock-{next(token_ids)}"
+        tokens.add(access_token)
+        stats["tokens"] += 1
+        return {"access_token": access_token, "token_type": "Bearer", "expires_in": 86400}
+    
+    @app.get("/health")
+    async def health():
+        return {"status": "ok", "counts": account.counts, **stats}
+    
+    def collection(entity: str):
+        async def list_records(
+            skip: int = Query(0, ge=0),
+            limit: int = Query(25, ge=1, le=100),
+            filters: Optional[str] = None,
+        ):
+            return account.page(entity, skip, limit, json.loads(filters) if filters else [])
+        return list_records
+    
+    app.get("/listings")(collection("listings"))
+    app.get("/guests")(collection("guests"))
+    app.get("/reservations")(collection("reservations"))
+    app.get("/communication/conversations")(collection("conversations"))
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8055)
+    parser.add_argument("--listings", type=int, default=1000)
+    parser.add_argument("--reservations", type=int, default=500_000)
+    parser.add_argument("--latency-ms", type=float, default=50, help="Mean added latency per request")
+    parser.add_argument("--jitter-ms", type=float, default=20, help="Uniform +/- spread of the latency")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--rate-401", type=float, default=0.0, help="Fraction of requests answered with 401")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    
+    # Imported here so that the data generator can be used without uvicorn
+    import uvicorn
+    
+    print(f"Generating synthetic account ({args.listings} listings, {args.reservations} reservations)...")
+    account = SyntheticAccount(args.listings, args.reservations, args.seed)
+    app = create_app(account, args.latency_ms, args.jitter_ms, args.rate_429, args.rate_401, args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
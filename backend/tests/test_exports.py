@@ -0,0 +1,17 @@
+"""Export endpoints reject bad filters before streaming anything."""
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routes import exports
+
+
+def test_malformed_date_is_a_bad_request():
+    app = FastAPI()
+    app.include_router(exports.router)
+    client = TestClient(app)
+    
+    response = client.get("/api/exports/reservations", params={"end_date": "2024-13-01"})
+    
+    assert response.status_code == 400
+    assert "2024-13-01" in response.json()["detail"]
@@ -0,0 +1,43 @@
+"""Tests for the shared Guesty OAuth token cache."""
+
+import threading
+import time
+
+import httpx
+
+from app.services.guesty.client import GuestyToken
+
+
+def token_response(access_token: str) -> httpx.Response:
+    return httpx.Response(200, json={"access_token": access_token, "expires_in": 86400})
+
+
+def test_concurrent_cold_start_fetches_one_token():
+    token = GuestyToken()
+    fetches = []
+    
+    def fetch():
+        fetches.append(1)
+        time.sleep(0.05)
+        return token_response(f"token-{len(fetches)}")
+    
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(token.get(fetch))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert len(fetches) == 1
+    assert results == ["token-1"] * 8
+
+
+def test_invalidate_keeps_a_token_already_replaced():
+    token = GuestyToken()
+    token.get(lambda: token_response("old"))
+    token.invalidate("old")
+    assert token.get(lambda: token_response("new")) == "new"
+    
+    # A request that was still using the old token gets its 401 late
+    token.invalidate("old")
+    assert token.get(lambda: token_response("newer")) == "new"
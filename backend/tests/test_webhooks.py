@@ -0,0 +1,89 @@
+"""Tests for the webhook micro-batch buffer."""
+
+import asyncio
+
+import pytest
+
+from app.services.sync import webhooks
+
+
+class FakeSession:
+    def commit(self):
+        pass
+    
+    def rollback(self):
+        pass
+    
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def written(monkeypatch):
+    """guesty_ids upserted per table, with the database and generation stubbed out."""
+    rows = {}
+    
+    def upsert_rows(db, model, batch):
+        rows.setdefault(model.__tablename__, []).extend(row["guesty_id"] for row in batch)
+        return len(batch), 0, 0
+    
+    monkeypatch.setattr(webhooks, "SessionLocal", FakeSession)
+    monkeypatch.setattr(webhooks, "upsert_rows", upsert_rows)
+    monkeypatch.setattr(webhooks, "refresh_daily_facts", lambda db: 0)
+    monkeypatch.setattr(webhooks.data_generation, "advance", lambda db: None)
+    return rows
+
+
+def test_null_fields_skip_only_that_payload(written):
+    buffer = webhooks.WebhookBuffer(batch_size=100, flush_seconds=1)
+    buffer.add({"listing": {"_id": "listing-null", "title": "Null address", "address": None}})
+    buffer.add({"reservation": {"_id": "reservation-null", "listingId": "listing-null", "money": None, "checkIn": None}})
+    buffer.add({"listing": {"_id": "listing-ok", "title": "Loft", "address": {"full": "1 Main St"}}})
+    
+    assert buffer.flush() == 1
+    assert written == {"listings": ["listing-ok"]}
+    assert buffer.dropped == 2
+    assert len(buffer) == 0
+
+
+def test_reservations_refresh_the_rollup_before_a_new_generation(written, monkeypatch):
+    steps = []
+    monkeypatch.setattr(webhooks, "refresh_daily_facts", lambda db: steps.append("refresh"))
+    monkeypatch.setattr(webhooks.data_generation, "advance", lambda db: steps.append("advance"))
+    buffer = webhooks.WebhookBuffer(batch_size=100, flush_seconds=1)
+    
+    buffer.add({"listing": {"_id": "listing-ok", "title": "Loft", "address": {"full": "1 Main St"}}})
+    buffer.flush()
+    assert steps == ["advance"]
+    
+    buffer.add({"reservation": {
+        "_id": "reservation-ok", "listingId": "listing-ok", "status": "confirmed",
+        "checkIn": "2024-05-01", "checkOut": "2024-05-04", "money": {"hostPayout": 300},
+    }})
+    buffer.flush()
+    assert written["reservations"] == ["reservation-ok"]
+    assert steps == ["advance", "refresh", "advance"]
+
+
+def test_flusher_survives_a_failed_flush(monkeypatch):
+    buffer = webhooks.WebhookBuffer(batch_size=100, flush_seconds=0.01)
+    calls = []
+    
+    def flush():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+        return 0
+    
+    monkeypatch.setattr(buffer, "flush", flush)
+    
+    async def run():
+        buffer.start()
+        await asyncio.sleep(0.1)
+        task = buffer._task
+        assert not task.done()
+        task.cancel()
+        buffer._task = None
+    
+    asyncio.run(run())
+    assert len(calls) > 1
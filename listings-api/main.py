@@ -2,17 +2,25 @@
 Listing Performance API — lightweight micro-service.
 Connects to the same Guesty Insights Postgres database and serves
 the /api/analytics/listing-performance endpoint.
+
+The Guesty rate limiter comes from the backend package: run locally with
+PYTHONPATH=../backend; the Docker image copies it in.
 """
 
+import hashlib
+import json
 import os
+import time
 import httpx
 from collections import defaultdict
 from datetime import date
 
 import asyncpg
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.services.guesty.rate_limiter import RateLimiter, rate_limit_delay
+
 app = FastAPI(title="Guesty Listings API", version="1.0.0")
 
 app.add_middleware(
@@ -25,6 +33,33 @@ app.add_middleware(
 
 pool = None
 
+# How often the data generation (the backend's data_generation_seq) is re-read; within
+# this window a matching If-None-Match is answered without touching Postgres
+GENERATION_TTL_SECONDS = float(os.environ.get("GENERATION_TTL_SECONDS", "5"))
+_generation = {"value": None, "read_at": 0.0}
+
+
+# Both services spend the same Guesty budget, so each paces itself to a share
+# of it with the backend's limiter (copied into the image, see the Dockerfile)
+GUESTY_RATE_LIMITS = {
+    1.0: int(os.environ.get("GUESTY_RATE_LIMIT_PER_SECOND", "15")),
+    60.0: int(os.environ.get("GUESTY_RATE_LIMIT_PER_MINUTE", "120")),
+    3600.0: int(os.environ.get("GUESTY_RATE_LIMIT_PER_HOUR", "5000")),
+}
+guesty_limiter = RateLimiter(GUESTY_RATE_LIMITS, share=float(os.environ.get("GUESTY_RATE_LIMIT_SHARE", "0.2")))
+
+
+async def guesty_get(http: httpx.AsyncClient, url: str, retries: int = 6, **kwargs) -> httpx.Response:
+    """GET a Guesty endpoint through the shared rate limiter, retrying 429s."""
+    for attempt in range(retries):
+        await guesty_limiter.acquire_async()
+        resp = await http.get(url, **kwargs)
+        guesty_limiter.observe(resp.headers)
+        if resp.status_code != 429:
+            return resp
+        guesty_limiter.pause(rate_limit_delay(resp, attempt))
+    return resp
+
 
 def get_database_url():
     """Build database URL from individual DB_* vars or fall back to DATABASE_URL."""
@@ -42,6 +77,45 @@ def get_database_url():
     return os.environ.get("DATABASE_URL", "")
 
 
+async def data_generation() -> int:
+    """
+    Last value of the backend's ``data_generation_seq``, the version of everything served here.
+
+    The backend advances it after every successful sync, backfill and
+    webhook batch; sync ids would not do, as a resumed run keeps its old id.
+    """
+    now = time.monotonic()
+    if _generation["value"] is None or now - _generation["read_at"] >= GENERATION_TTL_SECONDS:
+        async with pool.acquire() as conn:
+            value = await conn.fetchval("SELECT last_value FROM data_generation_seq")
+        _generation.update(value=value, read_at=now)
+    return _generation["value"]
+
+
+async def advance_data_generation(conn):
+    """Start a new data generation after a write here, for this service and the backend."""
+    await conn.fetchval("SELECT nextval('data_generation_seq')")
+    _generation.update(value=None)
+
+
+async def not_modified(request: Request, response: Response, endpoint: str, params: dict):
+    """
+    Set the ETag of (endpoint, params, data generation) on ``response``.
+
+    Returns an empty 304 to send instead when the client's If-None-Match
+    already has it, or None when the endpoint should run.
+    """
+    key = [endpoint, {k: str(v) for k, v in params.items() if v is not None}, await data_generation()]
+    etag = '"' + hashlib.sha1(json.dumps(key, sort_keys=True).encode()).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    tags = [tag.strip().removeprefix("W/") for tag in request.headers.get("If-None-Match", "").split(",")]
+    if "*" in tags or etag in tags:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
 @app.on_event("startup")
 async def startup():
     global pool
@@ -132,7 +206,8 @@ async def sync_addresses_from_guesty():
         skip = 0
         limit = 100
         while True:
-            resp = await http.get(
+            resp = await guesty_get(
+                http,
                 "https://open-api.guesty.com/v1/listings",
                 params={"skip": skip, "limit": limit, "fields": "title nickname address _id"},
                 headers={"Authorization": f"Bearer {access_token}"},
@@ -172,6 +247,10 @@ async def sync_addresses_from_guesty():
             else:
                 not_found += 1
 
+        # Cached responses and ETags carry the old addresses
+        if updated:
+            await advance_data_generation(conn)
+
     return {
         "status": "complete",
         "guesty_listings_fetched": len(all_listings),
@@ -182,6 +261,8 @@ async def sync_addresses_from_guesty():
 
 @app.get("/api/analytics/listing-performance")
 async def listing_performance(
+    request: Request,
+    response: Response,
     start_date: date = Query(None),
     end_date: date = Query(None),
     source: str = Query(None),
@@ -190,6 +271,13 @@ async def listing_performance(
     Returns every listing with address, details, and monthly revenue
     broken down by booking channel.
     """
+    cached = await not_modified(
+        request, response, "listing-performance",
+        {"start_date": start_date, "end_date": end_date, "source": source},
+    )
+    if cached is not None:
+        return cached
+
     # Build the query — join listings with confirmed reservations
     # Group by listing + month + source
     where_clauses = ["r.status = 'confirmed'"]